@@ -1,23 +1,71 @@
 from __future__ import annotations
 
 import asyncio
+import base64
+import bisect
+import csv
+import fcntl
+import gzip
+import hashlib
+import io
+import itertools
 import json
+import logging
+import math
+import mmap
+import operator
 import os
 import random
+import re
+import struct
+import sys
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Iterable, Mapping
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
 from typing import Any
 from urllib.parse import quote
 from uuid import uuid4
 
 import jwt
-from fastapi import FastAPI, File, Form, HTTPException, Request, Response, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi import Depends, FastAPI, File, Form, HTTPException, Query, Request, Response, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from passlib.context import CryptContext
 from pydantic import BaseModel
+from starlette.requests import cookie_parser
 
-app = FastAPI(title="Kupa Rashit Demo API", version="2.0.0")
+logger = logging.getLogger(__name__)
+_STARTUP_STARTED = time.perf_counter()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    warmup = None
+    if LAZY_STARTUP:
+        # /health answers right away; inventory readers block in prepare_demo_data() until seed data exists.
+        async def warm_up() -> None:
+            try:
+                await asyncio.to_thread(load_startup_inventory)
+            except Exception:
+                logger.exception("Lazy startup warm-up failed")
+
+        warmup = asyncio.create_task(warm_up())
+    else:
+        await asyncio.to_thread(load_startup_inventory)
+    try:
+        yield
+    finally:
+        if warmup is not None:
+            await warmup
+        stop_inventory_refresher()
+        shutdown_password_pool()
+
+
+app = FastAPI(title="Kupa Rashit Demo API", version="2.0.0", lifespan=lifespan)
 
 ALLOWED_ORIGINS = {
     "http://localhost:5173",
@@ -38,6 +86,42 @@ ACCESS_TOKEN_TTL_MIN = int(os.getenv("ACCESS_TOKEN_TTL_MIN", "60"))
 ACCESS_COOKIE_NAME = os.getenv("ACCESS_COOKIE_NAME", "access_token")
 COOKIE_SECURE = os.getenv("COOKIE_SECURE", "false").lower() == "true"
 COOKIE_DOMAIN = os.getenv("COOKIE_DOMAIN")
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+# Append-only log that carries logouts and per-user revocations to every worker; unset keeps them per process.
+TOKEN_REVOCATION_LOG_PATH = os.getenv("TOKEN_REVOCATION_LOG_PATH", "")
+TOKEN_REVOCATION_SYNC_S = float(os.getenv("TOKEN_REVOCATION_SYNC_S", "0.5"))
+TOKEN_REVOCATION_LOG_MAX_BYTES = int(os.getenv("TOKEN_REVOCATION_LOG_MAX_BYTES", "1048576"))
+# Defer demo password hashing, demo seeding and the first inventory build from import to the lifespan hook or first use.
+LAZY_STARTUP = os.getenv("LAZY_STARTUP", "false").lower() == "true"
+# JSON object of username -> pbkdf2_sha256 hash; listed users never hash their demo password at startup.
+USER_PASSWORD_HASHES_PATH = os.getenv("USER_PASSWORD_HASHES_PATH", "")
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "0"))
+# Token buckets per (user id or client IP, route class) as "class=requests/seconds,...";
+# classes are login, contract, command and default. An empty value disables throttling.
+RATE_LIMITS = os.getenv("RATE_LIMITS", "login=10/60,contract=120/60,command=30/60")
+# memory (per worker) or shared (a bucket table in RATE_LIMIT_SHARED_PATH that every worker maps).
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").strip().lower() or "memory"
+RATE_LIMIT_SHARED_PATH = os.getenv("RATE_LIMIT_SHARED_PATH", "/tmp/ratelimit.table")
+RATE_LIMIT_SHARED_SLOTS = int(os.getenv("RATE_LIMIT_SHARED_SLOTS", "65536"))
+PASSWORD_HASH_WORKERS = max(1, int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1))))
+# Hash/verify calls queued or running at once; beyond this logins are rejected with 503 instead of piling up.
+PASSWORD_HASH_MAX_PENDING = max(1, int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64")))
+RESPONSE_GZIP_MIN_BYTES = int(os.getenv("RESPONSE_GZIP_MIN_BYTES", "1024"))
+CATALOG_CACHE_MAX_AGE_S = int(os.getenv("CATALOG_CACHE_MAX_AGE_S", "86400"))
+REFERENCE_CACHE_MAX_AGE_S = int(os.getenv("REFERENCE_CACHE_MAX_AGE_S", "300"))
+INVENTORY_PAGE_DEFAULT_LIMIT = int(os.getenv("INVENTORY_PAGE_DEFAULT_LIMIT", "100"))
+INVENTORY_PAGE_MAX_LIMIT = int(os.getenv("INVENTORY_PAGE_MAX_LIMIT", "1000"))
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", "65536"))
+INVENTORY_COMPACT = os.getenv("INVENTORY_COMPACT", "true").lower() == "true"
+# seed (built-in demo data), json / ndjson (INVENTORY_SNAPSHOT_PATH) or a registered collector source.
+INVENTORY_SOURCE = os.getenv("INVENTORY_SOURCE", "seed").strip().lower() or "seed"
+INVENTORY_SNAPSHOT_PATH = os.getenv("INVENTORY_SNAPSHOT_PATH", "")
+INVENTORY_REFRESH_INTERVAL_S = float(os.getenv("INVENTORY_REFRESH_INTERVAL_S", "0"))
+INVENTORY_SEARCH_DEFAULT_LIMIT = int(os.getenv("INVENTORY_SEARCH_DEFAULT_LIMIT", "20"))
+INVENTORY_SEARCH_MAX_LIMIT = int(os.getenv("INVENTORY_SEARCH_MAX_LIMIT", "200"))
+INVENTORY_LOOKUP_MAX_KEYS = int(os.getenv("INVENTORY_LOOKUP_MAX_KEYS", "10000"))
+# Per-network shards, e.g. "NesHarmin=ndjson:/data/nesharmin.ndjson,Lab=seed"; unset serves every network from the global inventory.
+INVENTORY_NETWORKS = os.getenv("INVENTORY_NETWORKS", "")
 try:
     TROUBLESHOOTER_DELAY_MS = max(0, int(os.getenv("TROUBLESHOOTER_DELAY_MS", "4500")))
 except ValueError:
@@ -45,8 +129,233 @@ except ValueError:
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
+# pbkdf2 runs inside hashlib with the GIL released, so a dedicated thread pool scales across cores
+# while keeping password work off Starlette's shared threadpool.
+_PASSWORD_POOL: ThreadPoolExecutor | None = None
+_PASSWORD_POOL_LOCK = threading.Lock()
+_PASSWORD_PENDING = 0
+
+
+def password_pool() -> ThreadPoolExecutor:
+    global _PASSWORD_POOL
+    with _PASSWORD_POOL_LOCK:
+        if _PASSWORD_POOL is None:
+            _PASSWORD_POOL = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password")
+        return _PASSWORD_POOL
+
+
+def shutdown_password_pool() -> None:
+    global _PASSWORD_POOL
+    with _PASSWORD_POOL_LOCK:
+        pool, _PASSWORD_POOL = _PASSWORD_POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _release_password_slot(_future: Any = None) -> None:
+    global _PASSWORD_PENDING
+    with _PASSWORD_POOL_LOCK:
+        _PASSWORD_PENDING -= 1
+
+
+async def run_password_task(fn: Any, *args: Any) -> Any:
+    global _PASSWORD_PENDING
+    with _PASSWORD_POOL_LOCK:
+        if _PASSWORD_PENDING >= PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=503,
+                detail="Login service is busy, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        _PASSWORD_PENDING += 1
+    try:
+        future = password_pool().submit(fn, *args)
+    except BaseException:
+        _release_password_slot()
+        raise
+    # The slot is held until the hash finishes, even if the awaiting request is cancelled.
+    future.add_done_callback(_release_password_slot)
+    return await asyncio.wrap_future(future)
+
+
+STARTUP_REPORT: dict[str, Any] = {"mode": "lazy" if LAZY_STARTUP else "eager", "ready": False, "phases": []}
+
+
+def record_startup_phase(name: str, started: float) -> None:
+    STARTUP_REPORT["phases"].append({"name": name, "ms": round((time.perf_counter() - started) * 1000, 2)})
+
+
+def finish_startup_report() -> None:
+    ready_ms = round((time.perf_counter() - _STARTUP_STARTED) * 1000, 2)
+    STARTUP_REPORT["ready"] = True
+    STARTUP_REPORT["readyMs"] = ready_ms
+    if STARTUP_BUDGET_MS > 0:
+        STARTUP_REPORT["budgetMs"] = STARTUP_BUDGET_MS
+        STARTUP_REPORT["withinBudget"] = ready_ms <= STARTUP_BUDGET_MS
+    phases = ", ".join(f"{phase['name']}={phase['ms']}ms" for phase in STARTUP_REPORT["phases"])
+    if STARTUP_REPORT.get("withinBudget") is False:
+        logger.warning("Startup took %sms, over the %sms budget (%s)", ready_ms, STARTUP_BUDGET_MS, phases)
+    else:
+        logger.info("Startup ready in %sms (%s)", ready_ms, phases)
+
+
+def load_password_hashes(path: str) -> dict[str, str]:
+    if not path:
+        return {}
+    try:
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        logger.exception("Could not load password hashes from %s", path)
+        return {}
+    return {str(username).lower(): str(password_hash) for username, password_hash in data.items() if password_hash}
 
-USERS_DB: list[dict[str, Any]] = [
+
+PRECOMPUTED_PASSWORD_HASHES = load_password_hashes(USER_PASSWORD_HASHES_PATH)
+# username -> demo password still waiting to be hashed (lazy startup only), and username -> event set once a
+# hash already in progress for that user has been stored.
+_DEFERRED_PASSWORDS: dict[str, str] = {}
+_DEFERRED_HASHING: dict[str, threading.Event] = {}
+_DEFERRED_PASSWORDS_LOCK = threading.Lock()
+
+
+def demo_password_hash(username: str, password: str) -> str | None:
+    precomputed = PRECOMPUTED_PASSWORD_HASHES.get(username.lower())
+    if precomputed:
+        return precomputed
+    if LAZY_STARTUP:
+        _DEFERRED_PASSWORDS[username.lower()] = password
+        return None
+    return pwd_context.hash(password)
+
+
+def user_password_hash(user: dict[str, Any]) -> str | None:
+    password_hash = user.get("password_hash")
+    if password_hash:
+        return password_hash
+    username = str(user["username"]).lower()
+    with _DEFERRED_PASSWORDS_LOCK:
+        if user.get("password_hash"):
+            return user["password_hash"]
+        password = _DEFERRED_PASSWORDS.pop(username, None)
+        if password is None:
+            pending = _DEFERRED_HASHING.get(username)
+        else:
+            pending = _DEFERRED_HASHING[username] = threading.Event()
+    if password is None:
+        # Another login of the same user is hashing; wait for it instead of failing this one.
+        if pending is not None:
+            pending.wait()
+        return user.get("password_hash")
+
+    # pbkdf2 runs outside the lock so first logins of different users hash in parallel on the password pool.
+    try:
+        password_hash = pwd_context.hash(password)
+    except Exception:
+        with _DEFERRED_PASSWORDS_LOCK:
+            _DEFERRED_PASSWORDS[username] = password
+            _DEFERRED_HASHING.pop(username, None)
+        pending.set()
+        raise
+    with _DEFERRED_PASSWORDS_LOCK:
+        # An admin may have set a new password meanwhile; that one wins.
+        if not user.get("password_hash"):
+            user["password_hash"] = password_hash
+        _DEFERRED_HASHING.pop(username, None)
+    pending.set()
+    return user["password_hash"]
+
+
+def check_user_password(user: dict[str, Any], password: str) -> bool:
+    password_hash = user_password_hash(user)
+    return bool(password_hash) and pwd_context.verify(password, password_hash)
+
+
+async def verify_user_password(user: dict[str, Any], password: str) -> bool:
+    return await run_password_task(check_user_password, user, password)
+
+
+async def hash_password(password: str) -> str:
+    return await run_password_task(pwd_context.hash, password)
+
+
+def _email_local_part(email: str) -> str:
+    return str(email or "").split("@")[0].lower()
+
+
+# Users keyed by id, with lookup indexes on lowercase username, email and email local-part.
+# Index buckets keep insertion order so duplicate keys resolve to the earliest user, as a list scan would.
+class UserDirectory:
+    __slots__ = ("_by_id", "_seq", "_next_seq", "_by_username", "_by_email", "_by_local_part", "_lock")
+
+    def __init__(self, users: list[dict[str, Any]] | None = None):
+        self._by_id: dict[str, dict[str, Any]] = {}
+        self._seq: dict[str, int] = {}
+        self._next_seq = 0
+        self._by_username: dict[str, list[dict[str, Any]]] = {}
+        self._by_email: dict[str, list[dict[str, Any]]] = {}
+        self._by_local_part: dict[str, list[dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        for user in users or ():
+            self.add(user)
+
+    def __iter__(self):
+        return iter(tuple(self._by_id.values()))
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def _index_keys(self, user: dict[str, Any]):
+        yield self._by_username, str(user["username"]).lower()
+        yield self._by_email, str(user["email"]).lower()
+        yield self._by_local_part, _email_local_part(user["email"])
+
+    def add(self, user: dict[str, Any]) -> None:
+        with self._lock:
+            if user["id"] in self._by_id:
+                raise ValueError(f"Duplicate user id {user['id']}")
+            self._by_id[user["id"]] = user
+            self._seq[user["id"]] = self._next_seq
+            self._next_seq += 1
+            for index, key in self._index_keys(user):
+                index.setdefault(key, []).append(user)
+
+    def remove(self, user: dict[str, Any]) -> None:
+        with self._lock:
+            if self._by_id.pop(user["id"], None) is None:
+                return
+            del self._seq[user["id"]]
+            for index, key in self._index_keys(user):
+                bucket = [item for item in index.get(key, ()) if item is not user]
+                if bucket:
+                    index[key] = bucket
+                else:
+                    index.pop(key, None)
+
+    def first(self) -> dict[str, Any] | None:
+        return next(iter(self._by_id.values()), None)
+
+    def get(self, user_id: str) -> dict[str, Any] | None:
+        return self._by_id.get(user_id)
+
+    def by_username(self, username: str) -> dict[str, Any] | None:
+        bucket = self._by_username.get(username.lower())
+        return bucket[0] if bucket else None
+
+    def by_email(self, email: str) -> dict[str, Any] | None:
+        bucket = self._by_email.get(email.lower())
+        return bucket[0] if bucket else None
+
+    def by_login(self, login: str) -> dict[str, Any] | None:
+        lowered = login.lower()
+        candidates = [bucket[0] for bucket in (self._by_username.get(lowered), self._by_local_part.get(lowered)) if bucket]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda user: self._seq.get(user["id"], 0))
+
+
+_users_started = time.perf_counter()
+USERS_DB = UserDirectory([
     {
         "id": "u1",
         "username": "admin",
@@ -55,7 +364,7 @@ USERS_DB: list[dict[str, Any]] = [
         "role": "admin",
         "teams": ["BLOCK", "NASA", "Shimiada", "Vans"],
         "avatar": None,
-        "password_hash": pwd_context.hash("admin123"),
+        "password_hash": demo_password_hash("admin", "admin123"),
     },
     {
         "id": "u2",
@@ -65,7 +374,7 @@ USERS_DB: list[dict[str, Any]] = [
         "role": "operator",
         "teams": ["BLOCK"],
         "avatar": None,
-        "password_hash": pwd_context.hash("sarah123"),
+        "password_hash": demo_password_hash("sarah", "sarah123"),
     },
     {
         "id": "u3",
@@ -75,7 +384,7 @@ USERS_DB: list[dict[str, Any]] = [
         "role": "viewer",
         "teams": ["NASA"],
         "avatar": None,
-        "password_hash": pwd_context.hash("john123"),
+        "password_hash": demo_password_hash("john", "john123"),
     },
     {
         "id": "u4",
@@ -85,9 +394,10 @@ USERS_DB: list[dict[str, Any]] = [
         "role": "operator",
         "teams": ["BLOCK", "NASA"],
         "avatar": None,
-        "password_hash": pwd_context.hash("maya123"),
+        "password_hash": demo_password_hash("maya", "maya123"),
     },
-]
+])
+record_startup_phase("users", _users_started)
 
 ADMIN_PERMISSION_ID = "isAdmin"
 USER_MANAGEMENT_PERMISSION_ID = "user-management"
@@ -352,6 +662,10 @@ RDMS_BY_VC_CLUSTER: dict[str, dict[str, dict[str, dict[str, Any]]]] = {
 }
 
 
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
 def seed_demo_inventory() -> None:
     for idx in range(4, 29):
         vc_name = f"VC-DEMO-{idx:02d}"
@@ -417,34 +731,679 @@ def seed_demo_inventory() -> None:
         }
 
 
-seed_demo_inventory()
+
+class InventoryRecord(Mapping):
+    # Read-only Mapping over __slots__ so inventory consumers keep using item access.
+    # "url" is optional: it is only exposed when the source object carried one.
+    __slots__ = ("url",)
+    FIELDS: tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "InventoryRecord":
+        record = cls.__new__(cls)
+        for field in cls.FIELDS:
+            setattr(record, field, _compact_value(data.get(field)))
+        record.url = str(data.get("url") or "")
+        return record
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if key == "url" and self.url:
+            return self.url
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from self.FIELDS
+        if self.url:
+            yield "url"
+
+    def __len__(self) -> int:
+        return len(self.FIELDS) + (1 if self.url else 0)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._values = operator.attrgetter("url", *cls.FIELDS)
+
+    def __eq__(self, other: object) -> bool:
+        # Reload diffs compare every object; same-type records compare slots without Mapping's dict copies.
+        if type(other) is type(self):
+            return self._values(self) == self._values(other)
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
 
 
-def build_inventory_tree() -> dict[str, dict[str, Any]]:
-    vc_names = set(DATASTORES_BY_VC_CLUSTER) | set(VMS_BY_VC_CLUSTER) | set(ESX_BY_VC_CLUSTER) | set(RDMS_BY_VC_CLUSTER)
+class DatastoreRecord(InventoryRecord):
+    __slots__ = ("name", "vc", "ds_cluster", "size")
+    FIELDS = ("name", "vc", "ds_cluster", "size")
+
+
+class VmRecord(InventoryRecord):
+    __slots__ = ("name", "naas_of_rdms", "datastore", "vc")
+    FIELDS = ("name", "naas_of_rdms", "datastore", "vc")
+
+
+class EsxRecord(InventoryRecord):
+    __slots__ = ("name", "vc", "esx_cluster", "pwwns")
+    FIELDS = ("name", "vc", "esx_cluster", "pwwns")
+
+
+class RdmRecord(InventoryRecord):
+    __slots__ = ("naa", "vc", "esx_cluster", "size", "connected")
+    FIELDS = ("naa", "vc", "esx_cluster", "size", "connected")
+
+
+def _compact_value(value: Any) -> Any:
+    # vc/cluster/datastore/naa strings repeat across objects, so they share one interned copy.
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return tuple(_compact_value(item) for item in value)
+    return value
+
+
+def compact_inventory_section(
+    section: dict[str, dict[str, dict[str, Any]]],
+    record_type: type[InventoryRecord],
+) -> dict[str, dict[str, dict[str, Any]]]:
+    return {
+        sys.intern(vc_name): {
+            sys.intern(cluster_name): {
+                sys.intern(object_name): item if isinstance(item, InventoryRecord) else record_type.from_dict(item)
+                for object_name, item in objects.items()
+            }
+            for cluster_name, objects in clusters.items()
+        }
+        for vc_name, clusters in section.items()
+    }
+
+
+INVENTORY_SECTIONS: dict[str, tuple[dict[str, Any], type[InventoryRecord]]] = {
+    "datastores": (DATASTORES_BY_VC_CLUSTER, DatastoreRecord),
+    "vms": (VMS_BY_VC_CLUSTER, VmRecord),
+    "esx": (ESX_BY_VC_CLUSTER, EsxRecord),
+    "rdms": (RDMS_BY_VC_CLUSTER, RdmRecord),
+}
+
+
+def compact_inventory() -> None:
+    # Replaces the per-object dicts in place, so existing references to the section dicts stay valid.
+    for section, record_type in INVENTORY_SECTIONS.values():
+        compacted = compact_inventory_section(section, record_type)
+        section.clear()
+        section.update(compacted)
+
+
+def seed_inventory_sections() -> dict[str, dict[str, Any]]:
+    # Copied down to the object maps so in-place edits of the seed dicts only reach a snapshot via refresh_inventory().
+    return {
+        name: {
+            vc_name: {cluster_name: dict(objects) for cluster_name, objects in clusters.items()}
+            for vc_name, clusters in section.items()
+        }
+        for name, (section, _record_type) in INVENTORY_SECTIONS.items()
+    }
+
+
+def inventory_section_changes(
+    previous: dict[str, dict[str, Any]],
+    sections: dict[str, dict[str, Any]],
+) -> set[tuple[str, str, str]]:
+    # (section, vc, cluster) object maps of a fresh load that differ from the tree it replaces. Equal maps are
+    # swapped for the previous snapshot's, so the next diff of an unchanged cluster stops at the identity check.
+    changes: set[tuple[str, str, str]] = set()
+    for name in INVENTORY_SECTIONS:
+        section = sections.setdefault(name, {})
+        for vc_name in previous.keys() | section.keys():
+            old_clusters = previous.get(vc_name, {})
+            new_clusters = section.get(vc_name, {})
+            for cluster_name in old_clusters.keys() | new_clusters.keys():
+                old_objects = old_clusters.get(cluster_name, {}).get(name) or {}
+                new_objects = new_clusters.get(cluster_name)
+                if new_objects is None:
+                    if old_objects:
+                        changes.add((name, vc_name, cluster_name))
+                elif new_objects is not old_objects:
+                    if new_objects == old_objects:
+                        new_clusters[cluster_name] = old_objects
+                    else:
+                        changes.add((name, vc_name, cluster_name))
+    return changes
+
+
+def diff_inventory_load(
+    previous: InventorySnapshot | None,
+    sections: dict[str, dict[str, Any]],
+    source: str,
+) -> set[tuple[str, str, str]] | None:
+    # The diff is only paid for when derived state (rollups) is carried forward from a snapshot of the same source;
+    # otherwise that state is rebuilt from the new snapshot on first read.
+    if previous is None or previous.source != source or "rollups" not in previous.views:
+        return None
+    return inventory_section_changes(previous.tree, sections)
+
+
+def build_inventory_tree(sections: dict[str, dict[str, Any]] | None = None) -> dict[str, dict[str, Any]]:
+    if sections is None:
+        sections = seed_inventory_sections()
+    datastores = sections.get("datastores", {})
+    vms = sections.get("vms", {})
+    esx = sections.get("esx", {})
+    rdms = sections.get("rdms", {})
+
+    vc_names = set(datastores) | set(vms) | set(esx) | set(rdms)
     tree: dict[str, dict[str, Any]] = {}
 
     for vc in sorted(vc_names):
         clusters = (
-            set(DATASTORES_BY_VC_CLUSTER.get(vc, {}))
-            | set(VMS_BY_VC_CLUSTER.get(vc, {}))
-            | set(ESX_BY_VC_CLUSTER.get(vc, {}))
-            | set(RDMS_BY_VC_CLUSTER.get(vc, {}))
+            set(datastores.get(vc, {}))
+            | set(vms.get(vc, {}))
+            | set(esx.get(vc, {}))
+            | set(rdms.get(vc, {}))
         )
 
         tree[vc] = {}
         for cluster in sorted(clusters):
             tree[vc][cluster] = {
-                "datastores": DATASTORES_BY_VC_CLUSTER.get(vc, {}).get(cluster, {}),
-                "vms": VMS_BY_VC_CLUSTER.get(vc, {}).get(cluster, {}),
-                "esx": ESX_BY_VC_CLUSTER.get(vc, {}).get(cluster, {}),
-                "rdms": RDMS_BY_VC_CLUSTER.get(vc, {}).get(cluster, {}),
+                "datastores": datastores.get(vc, {}).get(cluster, {}),
+                "vms": vms.get(vc, {}).get(cluster, {}),
+                "esx": esx.get(vc, {}).get(cluster, {}),
+                "rdms": rdms.get(vc, {}).get(cluster, {}),
             }
 
     return tree
 
 
-INVENTORY = build_inventory_tree()
+def _sorted_index(buckets: dict[Any, set[str] | list[str]]) -> dict[Any, list[str]]:
+    return {key: sorted(values) for key, values in buckets.items()}
+
+
+def build_inventory_indexes(tree: dict[str, dict[str, Any]]) -> dict[str, dict[Any, list[str]]]:
+    vm_names_by_vc: dict[str, set[str]] = {}
+    # Datastore and ESX name indexes keep every occurrence: the /network routes list each object, while the
+    # by-vc-cluster getters dedupe.
+    datastore_names_by_vc: dict[str, list[str]] = {}
+    esx_names_by_vc: dict[str, list[str]] = {}
+    ds_clusters_by_vc: dict[str, set[str]] = {}
+    esx_clusters_by_vc: dict[str, set[str]] = {}
+    datastore_names_by_vc_ds_cluster: dict[tuple[str, str], list[str]] = {}
+    rdm_naas_by_vc_esx_cluster: dict[tuple[str, str], set[str]] = {}
+    esx_names_by_vc_esx_cluster: dict[tuple[str, str], list[str]] = {}
+
+    for vc_data in tree.values():
+        for cluster_data in vc_data.values():
+            for vm in cluster_data.get("vms", {}).values():
+                if vm.get("name"):
+                    vm_names_by_vc.setdefault(vm.get("vc"), set()).add(vm["name"])
+
+            for ds in cluster_data.get("datastores", {}).values():
+                vc, ds_cluster, name = ds.get("vc"), ds.get("ds_cluster"), ds.get("name")
+                if name:
+                    datastore_names_by_vc.setdefault(vc, []).append(name)
+                if ds_cluster:
+                    ds_clusters_by_vc.setdefault(vc, set()).add(ds_cluster)
+                    if name:
+                        datastore_names_by_vc_ds_cluster.setdefault((vc, ds_cluster), []).append(name)
+
+            for esx in cluster_data.get("esx", {}).values():
+                vc, esx_cluster, name = esx.get("vc"), esx.get("esx_cluster"), esx.get("name")
+                if name:
+                    esx_names_by_vc.setdefault(vc, []).append(name)
+                if esx_cluster:
+                    esx_clusters_by_vc.setdefault(vc, set()).add(esx_cluster)
+                    if name:
+                        esx_names_by_vc_esx_cluster.setdefault((vc, esx_cluster), []).append(name)
+
+            for rdm in cluster_data.get("rdms", {}).values():
+                if rdm.get("naa") and rdm.get("esx_cluster"):
+                    rdm_naas_by_vc_esx_cluster.setdefault((rdm.get("vc"), rdm["esx_cluster"]), set()).add(rdm["naa"])
+
+    return {
+        "vm_names_by_vc": _sorted_index(vm_names_by_vc),
+        "datastore_names_by_vc": _sorted_index(datastore_names_by_vc),
+        "esx_names_by_vc": _sorted_index(esx_names_by_vc),
+        "ds_clusters_by_vc": _sorted_index(ds_clusters_by_vc),
+        "esx_clusters_by_vc": _sorted_index(esx_clusters_by_vc),
+        "datastore_names_by_vc_ds_cluster": _sorted_index(datastore_names_by_vc_ds_cluster),
+        "rdm_naas_by_vc_esx_cluster": _sorted_index(rdm_naas_by_vc_esx_cluster),
+        "esx_names_by_vc_esx_cluster": _sorted_index(esx_names_by_vc_esx_cluster),
+    }
+
+
+def normalize_pwwn(value: Any) -> str:
+    return "".join(ch for ch in str(value or "").lower() if ch in "0123456789abcdef")
+
+
+def normalize_lookup_key(value: Any) -> str:
+    return str(value or "").strip().lower()
+
+
+def build_inventory_reverse_indexes(tree: dict[str, dict[str, Any]]) -> dict[str, dict[Any, Any]]:
+    # Keys are normalized (lowercase, PWWNs hex-only); object entries keep the tree cluster for URL building.
+    rdm_by_naa: dict[str, dict[str, Any]] = {}
+    vms_by_naa: dict[str, list[str]] = {}
+    esx_by_pwwn: dict[str, dict[str, Any]] = {}
+    esx_by_name: dict[str, dict[str, Any]] = {}
+    vms_by_datastore: dict[str, list[str]] = {}
+
+    for cluster_map in tree.values():
+        for cluster_name, cluster_data in cluster_map.items():
+            for vm in cluster_data.get("vms", {}).values():
+                vm_name = vm.get("name")
+                if not vm_name:
+                    continue
+                datastore = normalize_lookup_key(vm.get("datastore"))
+                if datastore:
+                    vms_by_datastore.setdefault(datastore, []).append(vm_name)
+                for naa in dict.fromkeys(normalize_lookup_key(item) for item in vm.get("naas_of_rdms") or ()):
+                    if naa:
+                        vms_by_naa.setdefault(naa, []).append(vm_name)
+
+            for rdm in cluster_data.get("rdms", {}).values():
+                naa = normalize_lookup_key(rdm.get("naa"))
+                if naa:
+                    rdm_by_naa[naa] = {"item": rdm, "cluster": cluster_name}
+
+            for esx in cluster_data.get("esx", {}).values():
+                entry = {"item": esx, "cluster": cluster_name}
+                name = normalize_lookup_key(esx.get("name"))
+                if name:
+                    esx_by_name[name] = entry
+                for pwwn in esx.get("pwwns") or ():
+                    normalized = normalize_pwwn(pwwn)
+                    if normalized:
+                        esx_by_pwwn[normalized] = entry
+
+    return {
+        "rdm_by_naa": rdm_by_naa,
+        "vms_by_naa": {naa: sorted(names) for naa, names in vms_by_naa.items()},
+        "esx_by_pwwn": esx_by_pwwn,
+        "esx_by_name": esx_by_name,
+        "vms_by_datastore": {name: sorted(names) for name, names in vms_by_datastore.items()},
+    }
+
+
+class InventorySnapshot:
+    # Everything derived from one inventory load. Readers take a single reference through
+    # current_inventory() and use it for the whole request, so a concurrent swap never mixes versions.
+    # `views` holds lazily materialized projections and sort/filter indexes for this snapshot only.
+    # `changes` lists the (section, vc, cluster) object maps that differ from the snapshot this one replaced
+    # (see diff_inventory_load), or is None when no diff was taken.
+    __slots__ = ("version", "tree", "indexes", "vc_meta", "source", "updated_at", "views", "changes")
+
+    def __init__(
+        self,
+        tree: dict[str, dict[str, Any]],
+        indexes: dict[str, dict[Any, Any]],
+        vc_meta: dict[str, dict[str, Any]],
+        source: str,
+    ) -> None:
+        self.version = 0
+        self.tree = tree
+        self.indexes = indexes
+        self.vc_meta = vc_meta
+        self.source = source
+        self.updated_at = ""
+        self.views: dict[Any, Any] = {}
+        self.changes: set[tuple[str, str, str]] | None = None
+
+
+def build_inventory_snapshot(
+    sections: dict[str, dict[str, Any]],
+    vc_meta: dict[str, dict[str, Any]],
+    source: str,
+) -> InventorySnapshot:
+    tree = build_inventory_tree(sections)
+    indexes = {**build_inventory_indexes(tree), **build_inventory_reverse_indexes(tree)}
+    return InventorySnapshot(tree, indexes, dict(vc_meta), source)
+
+
+INVENTORY_STATE = InventorySnapshot({}, {}, {}, "empty")
+_DEMO_DATA_READY = False
+_DEMO_DATA_BUILDING = False
+_DEMO_DATA_LOCK = threading.RLock()
+_INVENTORY_SWAP_LOCK = threading.Lock()
+# Called with each newly published snapshot and the one it replaced, from the thread that loaded it, for state
+# derived from the inventory.
+INVENTORY_SWAP_HOOKS: list[Any] = []
+
+
+def current_inventory() -> InventorySnapshot:
+    if not _DEMO_DATA_READY:
+        prepare_demo_data()
+    return INVENTORY_STATE
+
+
+def swap_inventory(snapshot: InventorySnapshot) -> InventorySnapshot:
+    # The snapshot is fully built before this point; publishing it is a single reference assignment.
+    global INVENTORY_STATE
+    with _INVENTORY_SWAP_LOCK:
+        snapshot.version = INVENTORY_STATE.version + 1
+        snapshot.updated_at = now_iso()
+        INVENTORY_STATE = snapshot
+    return snapshot
+
+
+def refresh_inventory() -> InventorySnapshot:
+    # Call after mutating any *_BY_VC_CLUSTER dict or VC_META so the tree, indexes and views stay in sync.
+    return reload_inventory("seed")
+
+
+def inventory_index_lookup(index_name: str, key: Any, snapshot: InventorySnapshot | None = None) -> list[str]:
+    return list((snapshot or current_inventory()).indexes.get(index_name, {}).get(key, []))
+
+
+def inventory_reverse_lookup(index_name: str, key: Any, snapshot: InventorySnapshot | None = None) -> Any:
+    return (snapshot or current_inventory()).indexes.get(index_name, {}).get(key)
+
+
+INVENTORY_ROW_TYPES = {"datastore": "datastores", "vm": "vms", "esx": "esx", "rdm": "rdms"}
+INVENTORY_KEY_FIELDS = {"datastores": "name", "vms": "name", "esx": "name", "rdms": "naa"}
+
+
+def new_inventory_sections() -> dict[str, dict[str, Any]]:
+    return {name: {} for name in INVENTORY_SECTIONS}
+
+
+def add_inventory_row(sections: dict[str, dict[str, Any]], section_name: str, row: dict[str, Any]) -> None:
+    # Snapshot rows are flat objects plus "cluster", the compute cluster they sit under in the tree.
+    _section, record_type = INVENTORY_SECTIONS[section_name]
+    key_field = INVENTORY_KEY_FIELDS[section_name]
+    vc_name = str(row.get("vc") or "").strip()
+    object_name = str(row.get(key_field) or "").strip()
+    if not vc_name or not object_name:
+        raise ValueError(f"{section_name} row requires vc and {key_field}: {row!r}")
+    cluster_name = str(row.get("cluster") or row.get("esx_cluster") or row.get("ds_cluster") or "").strip()
+
+    if INVENTORY_COMPACT:
+        item: Any = record_type.from_dict(row)
+    else:
+        item = {field: row.get(field) for field in record_type.FIELDS}
+        if row.get("url"):
+            item["url"] = row["url"]
+    vc_bucket = sections[section_name].setdefault(sys.intern(vc_name), {})
+    vc_bucket.setdefault(sys.intern(cluster_name), {})[object_name] = item
+
+
+def load_inventory_rows(rows) -> tuple[dict[str, dict[str, Any]], dict[str, dict[str, Any]]]:
+    # Typed rows: {"type": "vcenter", "name": ..., <meta>} or {"type": "datastore"|"vm"|"esx"|"rdm", ...}.
+    sections = new_inventory_sections()
+    vc_meta: dict[str, dict[str, Any]] = {}
+    for index, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            raise ValueError(f"row {index}: expected an object")
+        row_type = str(row.get("type") or "").strip().lower()
+        if row_type == "vcenter":
+            vc_meta[str(row.get("name") or "")] = {
+                key: value for key, value in row.items() if key not in {"type", "name"}
+            }
+        elif row_type in INVENTORY_ROW_TYPES:
+            add_inventory_row(sections, INVENTORY_ROW_TYPES[row_type], row)
+        else:
+            raise ValueError(f"row {index}: unknown type {row_type!r}")
+    return sections, vc_meta
+
+
+def load_inventory_json(path: str) -> tuple[dict[str, dict[str, Any]], dict[str, dict[str, Any]]]:
+    # {"vcenters": {vc: meta}, "datastores": [...], "vms": [...], "esx": [...], "rdms": [...]}
+    with open(path, encoding="utf-8") as handle:
+        payload = json.load(handle)
+    if not isinstance(payload, dict):
+        raise ValueError(f"{path}: expected a JSON object")
+
+    sections = new_inventory_sections()
+    for section_name in INVENTORY_SECTIONS:
+        for row in payload.get(section_name) or []:
+            add_inventory_row(sections, section_name, row)
+    return sections, dict(payload.get("vcenters") or {})
+
+
+def load_inventory_ndjson(path: str) -> tuple[dict[str, dict[str, Any]], dict[str, dict[str, Any]]]:
+    with open(path, encoding="utf-8") as handle:
+        return load_inventory_rows(json.loads(line) for line in handle if line.strip())
+
+
+INVENTORY_SOURCES: dict[str, Any] = {
+    "seed": lambda: (seed_inventory_sections(), VC_META),
+    "json": lambda: load_inventory_json(INVENTORY_SNAPSHOT_PATH),
+    "ndjson": lambda: load_inventory_ndjson(INVENTORY_SNAPSHOT_PATH),
+}
+INVENTORY_REFRESH_STATUS: dict[str, Any] = {
+    "running": False,
+    "lastSource": None,
+    "lastSuccessAt": None,
+    "lastDurationMs": None,
+    "lastError": None,
+}
+_INVENTORY_RELOAD_LOCK = threading.Lock()
+_INVENTORY_REFRESH_STOP = threading.Event()
+_INVENTORY_REFRESH_THREAD: threading.Thread | None = None
+
+
+def register_inventory_source(name: str, collect) -> None:
+    # collect() returns an iterable of typed rows (see load_inventory_rows), e.g. from a vCenter collector.
+    INVENTORY_SOURCES[name] = lambda: load_inventory_rows(collect())
+
+
+def reload_inventory(source: str | None = None) -> InventorySnapshot:
+    source_name = source or INVENTORY_SOURCE
+    loader = INVENTORY_SOURCES.get(source_name)
+    if loader is None:
+        raise ValueError(f"Unknown inventory source: {source_name}")
+
+    # Builders are serialized; readers never take this lock and keep using the previous snapshot.
+    with _INVENTORY_RELOAD_LOCK:
+        INVENTORY_REFRESH_STATUS["running"] = True
+        INVENTORY_REFRESH_STATUS["lastSource"] = source_name
+        started = time.perf_counter()
+        try:
+            previous = INVENTORY_STATE
+            sections, vc_meta = loader()
+            changes = diff_inventory_load(previous, sections, source_name)
+            snapshot = build_inventory_snapshot(sections, vc_meta, source_name)
+            snapshot.changes = changes
+            snapshot = swap_inventory(snapshot)
+        except Exception as exc:
+            INVENTORY_REFRESH_STATUS["lastError"] = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            INVENTORY_REFRESH_STATUS["running"] = False
+        INVENTORY_REFRESH_STATUS["lastSuccessAt"] = snapshot.updated_at
+        INVENTORY_REFRESH_STATUS["lastDurationMs"] = int((time.perf_counter() - started) * 1000)
+        INVENTORY_REFRESH_STATUS["lastError"] = None
+        for hook in INVENTORY_SWAP_HOOKS:
+            try:
+                hook(snapshot, previous)
+            except Exception:
+                logger.exception("Inventory swap hook %s failed for version %s", getattr(hook, "__name__", hook), snapshot.version)
+    return snapshot
+
+
+def _inventory_source_mtime() -> float | None:
+    if INVENTORY_SOURCE in {"json", "ndjson"}:
+        path = INVENTORY_SNAPSHOT_PATH
+    else:
+        return None
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _inventory_refresh_loop() -> None:
+    # File sources are only reloaded when the snapshot file changes; other sources reload every interval.
+    last_mtime = _inventory_source_mtime()
+    while not _INVENTORY_REFRESH_STOP.wait(INVENTORY_REFRESH_INTERVAL_S):
+        mtime = _inventory_source_mtime()
+        if mtime is not None and mtime == last_mtime:
+            continue
+        try:
+            reload_inventory()
+            last_mtime = mtime
+        except Exception:
+            logger.exception("Inventory refresh from %s failed; keeping version %s", INVENTORY_SOURCE, INVENTORY_STATE.version)
+
+
+INVENTORY_PATH_LOADERS = {"json": load_inventory_json, "ndjson": load_inventory_ndjson}
+
+
+def parse_inventory_networks(value: str) -> dict[str, tuple[str, str]]:
+    networks: dict[str, tuple[str, str]] = {}
+    for item in value.split(","):
+        name, _, spec = item.partition("=")
+        name = name.strip()
+        if not name:
+            continue
+        source, _, path = spec.strip().partition(":")
+        source = source.strip().lower() or "seed"
+        if source != "seed" and (source not in INVENTORY_PATH_LOADERS or not path.strip()):
+            raise ValueError(f"Invalid inventory network spec: {item.strip()!r}")
+        networks[name] = (source, path.strip())
+    return networks
+
+
+# Each network is an independent snapshot with its own indexes, version, lock and refresh thread.
+INVENTORY_NETWORK_SPECS = parse_inventory_networks(INVENTORY_NETWORKS)
+INVENTORY_SHARDS: dict[str, InventorySnapshot] = {}
+INVENTORY_SHARD_STATUS: dict[str, dict[str, Any]] = {
+    network: {"running": False, "lastSuccessAt": None, "lastDurationMs": None, "lastError": None}
+    for network in INVENTORY_NETWORK_SPECS
+}
+_INVENTORY_SHARD_LOCKS = {network: threading.Lock() for network in INVENTORY_NETWORK_SPECS}
+_INVENTORY_SHARD_THREADS: list[threading.Thread] = []
+
+
+def _inventory_shard_mtime(network: str) -> float | None:
+    _source, path = INVENTORY_NETWORK_SPECS[network]
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def reload_inventory_shard(network: str) -> InventorySnapshot:
+    source, path = INVENTORY_NETWORK_SPECS[network]
+    status = INVENTORY_SHARD_STATUS[network]
+    with _INVENTORY_SHARD_LOCKS[network]:
+        status["running"] = True
+        started = time.perf_counter()
+        previous = INVENTORY_SHARDS.get(network)
+        label = f"{source}:{path}" if path else source
+        try:
+            sections, vc_meta = INVENTORY_PATH_LOADERS[source](path) if path else (seed_inventory_sections(), VC_META)
+            changes = diff_inventory_load(previous, sections, label)
+            snapshot = build_inventory_snapshot(sections, vc_meta, label)
+            snapshot.changes = changes
+        except Exception as exc:
+            status["lastError"] = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            status["running"] = False
+        carry_inventory_rollups(snapshot, previous)
+        snapshot.version = (previous.version if previous else 0) + 1
+        snapshot.updated_at = now_iso()
+        INVENTORY_SHARDS[network] = snapshot
+        status["lastSuccessAt"] = snapshot.updated_at
+        status["lastDurationMs"] = int((time.perf_counter() - started) * 1000)
+        status["lastError"] = None
+    return snapshot
+
+
+def load_inventory_shards() -> None:
+    # One network failing to load must not keep the others from serving.
+    for network in INVENTORY_NETWORK_SPECS:
+        try:
+            reload_inventory_shard(network)
+        except Exception:
+            logger.exception("Inventory shard %s failed to load", network)
+
+
+def inventory_shard(network: str) -> InventorySnapshot:
+    # Without INVENTORY_NETWORKS every network reads the global inventory.
+    if not INVENTORY_NETWORK_SPECS:
+        return current_inventory()
+    snapshot = INVENTORY_SHARDS.get(network)
+    if snapshot is None:
+        if network not in INVENTORY_NETWORK_SPECS:
+            raise HTTPException(status_code=404, detail=f"Unknown network: {network}")
+        raise HTTPException(status_code=503, detail=f"Inventory for network {network} is not loaded yet")
+    return snapshot
+
+
+def _inventory_shard_refresh_loop(network: str) -> None:
+    last_mtime = _inventory_shard_mtime(network)
+    while not _INVENTORY_REFRESH_STOP.wait(INVENTORY_REFRESH_INTERVAL_S):
+        mtime = _inventory_shard_mtime(network)
+        if mtime is not None and mtime == last_mtime:
+            continue
+        try:
+            reload_inventory_shard(network)
+            last_mtime = mtime
+        except Exception:
+            logger.exception("Inventory shard %s refresh failed; keeping the previous snapshot", network)
+
+
+def trigger_inventory_shard_refresh(network: str) -> bool:
+    if INVENTORY_SHARD_STATUS[network]["running"]:
+        return False
+
+    def run() -> None:
+        try:
+            reload_inventory_shard(network)
+        except Exception:
+            logger.exception("Inventory shard %s refresh failed", network)
+
+    threading.Thread(target=run, name=f"inventory-refresh-{network}-once", daemon=True).start()
+    return True
+
+
+def start_inventory_refresher() -> None:
+    global _INVENTORY_REFRESH_THREAD
+    if INVENTORY_REFRESH_INTERVAL_S <= 0 or _INVENTORY_REFRESH_THREAD is not None:
+        return
+    _INVENTORY_REFRESH_STOP.clear()
+    _INVENTORY_REFRESH_THREAD = threading.Thread(target=_inventory_refresh_loop, name="inventory-refresh", daemon=True)
+    _INVENTORY_REFRESH_THREAD.start()
+    for network in INVENTORY_NETWORK_SPECS:
+        thread = threading.Thread(
+            target=_inventory_shard_refresh_loop,
+            args=(network,),
+            name=f"inventory-refresh-{network}",
+            daemon=True,
+        )
+        thread.start()
+        _INVENTORY_SHARD_THREADS.append(thread)
+
+
+def stop_inventory_refresher() -> None:
+    global _INVENTORY_REFRESH_THREAD
+    _INVENTORY_REFRESH_STOP.set()
+    if _INVENTORY_REFRESH_THREAD is not None:
+        _INVENTORY_REFRESH_THREAD.join(timeout=5)
+        _INVENTORY_REFRESH_THREAD = None
+    while _INVENTORY_SHARD_THREADS:
+        _INVENTORY_SHARD_THREADS.pop().join(timeout=5)
+
+
+def trigger_inventory_refresh(source: str | None = None) -> bool:
+    if INVENTORY_REFRESH_STATUS["running"]:
+        return False
+
+    def run() -> None:
+        try:
+            reload_inventory(source)
+        except Exception:
+            logger.exception("Inventory refresh from %s failed", source or INVENTORY_SOURCE)
+
+    threading.Thread(target=run, name="inventory-refresh-once", daemon=True).start()
+    return True
+
 
 EXCH_VOLUMES = [
     {
@@ -521,7 +1480,58 @@ def seed_demo_netapps() -> None:
         )
 
 
-seed_demo_netapps()
+def prepare_demo_data() -> None:
+    global _DEMO_DATA_READY, _DEMO_DATA_BUILDING
+    if _DEMO_DATA_READY:
+        return
+    with _DEMO_DATA_LOCK:
+        # Swap hooks read the inventory while it is being built; they must not recurse into seeding.
+        if _DEMO_DATA_READY or _DEMO_DATA_BUILDING:
+            return
+        _DEMO_DATA_BUILDING = True
+        try:
+            started = time.perf_counter()
+            seed_demo_inventory()
+            seed_demo_netapps()
+            # Runs after seeding so the demo objects become InventoryRecords along with the built-in ones.
+            if INVENTORY_COMPACT:
+                compact_inventory()
+            record_startup_phase("seed", started)
+            started = time.perf_counter()
+            # The first published snapshot comes from the configured source: readers never see the demo seed
+            # standing in for a real inventory.
+            try:
+                if INVENTORY_SOURCE != "seed":
+                    reload_inventory()
+                else:
+                    refresh_inventory()
+            except Exception as exc:
+                logger.exception("Initial inventory load from %s failed", INVENTORY_SOURCE)
+                raise HTTPException(status_code=503, detail="Inventory is not loaded yet") from exc
+            record_startup_phase("inventory", started)
+            _DEMO_DATA_READY = True
+        finally:
+            _DEMO_DATA_BUILDING = False
+
+
+def load_startup_inventory() -> None:
+    prepare_demo_data()
+    started = time.perf_counter()
+    load_inventory_shards()
+    record_startup_phase("shards", started)
+    start_inventory_refresher()
+    finish_startup_report()
+
+
+def netapp_machines() -> list[dict[str, Any]]:
+    if not _DEMO_DATA_READY:
+        prepare_demo_data()
+    return NETAPP_MACHINES
+
+
+# Sources registered by an importing module (register_inventory_source) load in the lifespan instead.
+if not LAZY_STARTUP and INVENTORY_SOURCE in INVENTORY_SOURCES:
+    prepare_demo_data()
 
 QTREES = [
     {
@@ -589,6 +1599,13 @@ class QtreePatchPayload(QtreeBasePayload):
     size_in_mb: int
 
 
+class InventoryLookupPayload(BaseModel):
+    vms: list[str] | None = None
+    datastores: list[str] | None = None
+    esx: list[str] | None = None
+    naas: list[str] | None = None
+
+
 class AdminGroupCreatePayload(BaseModel):
     name: str
     permissionKeys: list[str]
@@ -609,10 +1626,6 @@ class AdminUserUpdatePayload(BaseModel):
     password: str | None = None
 
 
-def now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
 def build_demo_object_url(kind: str, *parts: Any) -> str:
     path_parts = [quote(str(part).strip(), safe="") for part in parts if str(part).strip()]
     suffix = "/".join(path_parts)
@@ -627,15 +1640,101 @@ async def apply_troubleshooter_delay() -> None:
     await asyncio.sleep(TROUBLESHOOTER_DELAY_MS / 1000)
 
 
+# Team permissions compiled to bitsets over interned permission ids; bit order follows sorted ids,
+# so decoding a mask yields an already sorted list. Rebuilt by compile_permission_model() whenever
+# TEAM_PERMISSIONS or TEAM_PERMISSION_FLAGS change.
+class PermissionModel:
+    __slots__ = (
+        "permission_ids",
+        "team_bits",
+        "team_by_name",
+        "team_by_flag",
+        "teams",
+        "permission_keys",
+        "known_permissions",
+        "admin_bits",
+        "_decoded",
+    )
+
+    def __init__(self, team_permissions: dict[str, list[str]], team_flags: dict[str, str]):
+        known = {str(permission).strip() for values in team_permissions.values() for permission in values}
+        known.discard("")
+        known.add(USER_MANAGEMENT_PERMISSION_ID)
+        interned = {str(permission) for values in team_permissions.values() for permission in values}
+        interned.update(known)
+        interned.add(ADMIN_PERMISSION_ID)
+        self.permission_ids = sorted(interned)
+        bit_of = {permission: 1 << index for index, permission in enumerate(self.permission_ids)}
+
+        self.team_bits: dict[str, int] = {}
+        self.team_by_name: dict[str, str] = {}
+        for team_name, values in team_permissions.items():
+            mask = 0
+            for permission in values:
+                mask |= bit_of[str(permission)]
+            self.team_bits[team_name] = mask
+            self.team_by_name.setdefault(str(team_name).lower(), team_name)
+
+        self.team_by_flag: dict[str, str] = {}
+        for team_name, permission_key in team_flags.items():
+            lowered = str(permission_key).strip().lower()
+            if lowered:
+                self.team_by_flag.setdefault(lowered, team_name)
+
+        self.teams = sorted(team_permissions.keys())
+        self.permission_keys = sorted(
+            {str(permission_key).strip() for permission_key in team_flags.values() if str(permission_key).strip()},
+            key=lambda value: value.lower(),
+        )
+        self.known_permissions = sorted(known)
+        self.admin_bits = 0
+        for permission in (*known, ADMIN_PERMISSION_ID):
+            self.admin_bits |= bit_of[permission]
+        self._decoded: dict[int, list[str]] = {}
+
+    def resolve(self, value: str) -> str | None:
+        if value in self.team_bits:
+            return value
+        lowered = value.lower()
+        return self.team_by_name.get(lowered) or self.team_by_flag.get(lowered)
+
+    def teams_mask(self, teams: list[str]) -> int:
+        mask = 0
+        team_bits = self.team_bits
+        for team in teams:
+            mask |= team_bits.get(team, 0)
+        return mask
+
+    def decode(self, mask: int) -> list[str]:
+        decoded = self._decoded.get(mask)
+        if decoded is None:
+            decoded = []
+            ids = self.permission_ids
+            remaining = mask
+            while remaining:
+                low = remaining & -remaining
+                decoded.append(ids[low.bit_length() - 1])
+                remaining ^= low
+            if len(self._decoded) >= 4096:
+                self._decoded.clear()
+            self._decoded[mask] = decoded
+        return list(decoded)
+
+
+def compile_permission_model() -> None:
+    global PERMISSION_MODEL
+    PERMISSION_MODEL = PermissionModel(TEAM_PERMISSIONS, TEAM_PERMISSION_FLAGS)
+
+
+PERMISSION_MODEL = PermissionModel(TEAM_PERMISSIONS, TEAM_PERMISSION_FLAGS)
+
+
 def permissions_for_teams(teams: list[str]) -> list[str]:
-    merged: set[str] = set()
-    for team in teams:
-        merged.update(TEAM_PERMISSIONS.get(team, []))
-    return sorted(merged)
+    return PERMISSION_MODEL.decode(PERMISSION_MODEL.teams_mask(teams))
 
 
 def all_known_teams() -> list[str]:
-    return sorted(TEAM_PERMISSIONS.keys())
+    return list(PERMISSION_MODEL.teams)
 
 
 def permission_key_for_team(team_name: str) -> str:
@@ -643,34 +1742,14 @@ def permission_key_for_team(team_name: str) -> str:
 
 
 def all_known_permission_keys() -> list[str]:
-    return sorted(
-        {
-            str(permission_key).strip()
-            for permission_key in TEAM_PERMISSION_FLAGS.values()
-            if str(permission_key).strip()
-        },
-        key=lambda value: value.lower(),
-    )
+    return list(PERMISSION_MODEL.permission_keys)
 
 
 def resolve_team_name(team_or_permission_key: str) -> str | None:
     normalized = str(team_or_permission_key or "").strip()
     if not normalized:
         return None
-
-    if normalized in TEAM_PERMISSIONS:
-        return normalized
-
-    lowered = normalized.lower()
-    for team_name in TEAM_PERMISSIONS.keys():
-        if str(team_name).lower() == lowered:
-            return team_name
-
-    for team_name, permission_key in TEAM_PERMISSION_FLAGS.items():
-        if str(permission_key).strip().lower() == lowered:
-            return team_name
-
-    return None
+    return PERMISSION_MODEL.resolve(normalized)
 
 
 def normalize_team_list(values: list[str] | None, *, field_name: str = "teams", strict: bool = True) -> list[str]:
@@ -706,12 +1785,13 @@ def normalize_permission_key_list(
 
 
 def permissions_for_permission_keys(permission_keys: list[str]) -> list[str]:
-    merged: set[str] = set()
+    model = PERMISSION_MODEL
+    mask = 0
     for permission_key in permission_keys:
         team_name = resolve_team_name(permission_key)
         if team_name:
-            merged.update(TEAM_PERMISSIONS.get(team_name, []))
-    return sorted(merged)
+            mask |= model.team_bits.get(team_name, 0)
+    return model.decode(mask)
 
 
 def ensure_group_permission_flag(group_name: str) -> str:
@@ -734,11 +1814,7 @@ def ensure_group_permission_flag(group_name: str) -> str:
 
 
 def all_known_permissions() -> list[str]:
-    merged: set[str] = set()
-    for values in TEAM_PERMISSIONS.values():
-        merged.update(str(permission).strip() for permission in values if str(permission).strip())
-    merged.add(USER_MANAGEMENT_PERMISSION_ID)
-    return sorted(merged)
+    return list(PERMISSION_MODEL.known_permissions)
 
 
 def is_admin_user(user: dict[str, Any] | None) -> bool:
@@ -752,28 +1828,19 @@ def effective_user_teams(user: dict[str, Any]) -> list[str]:
 
 
 def effective_user_permissions(user: dict[str, Any], teams: list[str] | None = None) -> list[str]:
+    model = PERMISSION_MODEL
     team_list = teams if teams is not None else effective_user_teams(user)
-    merged = set(permissions_for_teams(team_list))
+    mask = model.teams_mask(team_list)
     if is_admin_user(user):
-        merged.update(all_known_permissions())
-        merged.add(ADMIN_PERMISSION_ID)
-    return sorted(merged)
-
-
-def require_admin_user(request: Request) -> dict[str, Any]:
-    user = current_user_from_request(request)
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    if not is_admin_user(user):
-        raise HTTPException(status_code=403, detail="Admin access required")
-    return user
+        mask |= model.admin_bits
+    return model.decode(mask)
 
 
 def find_user_by_id(user_id: str) -> dict[str, Any] | None:
     normalized = str(user_id or "").strip()
     if not normalized:
         return None
-    return next((user for user in USERS_DB if user["id"] == normalized), None)
+    return USERS_DB.get(normalized)
 
 
 def find_user_by_id_or_username(user_ref: str) -> dict[str, Any] | None:
@@ -785,22 +1852,36 @@ def find_user_by_id_or_username(user_ref: str) -> dict[str, Any] | None:
     if by_id:
         return by_id
 
-    lowered = normalized.lower()
-    return next((user for user in USERS_DB if user["username"].lower() == lowered), None)
+    return USERS_DB.by_username(normalized)
 
 
-def public_user(user: dict[str, Any]) -> dict[str, Any]:
-    teams = effective_user_teams(user)
-    return {
-        "id": user["id"],
-        "username": user["username"],
-        "name": user["name"],
-        "email": user["email"],
-        "teams": teams,
-        "teamPermissionKeys": normalize_permission_key_list(teams, strict=False),
-        "effectivePermissions": effective_user_permissions(user, teams),
-        "avatar": user.get("avatar"),
-    }
+PUBLIC_USER_FIELDS = ("id", "username", "name", "email", "teams", "teamPermissionKeys", "effectivePermissions", "avatar")
+_PUBLIC_USER_TEAM_FIELDS = {"teams", "teamPermissionKeys", "effectivePermissions"}
+
+
+def public_user(
+    user: dict[str, Any],
+    fields: tuple[str, ...] | None = None,
+    *,
+    teams: list[str] | None = None,
+    permissions: list[str] | None = None,
+) -> dict[str, Any]:
+    selected = fields or PUBLIC_USER_FIELDS
+    if teams is None:
+        teams = effective_user_teams(user) if _PUBLIC_USER_TEAM_FIELDS.intersection(selected) else []
+    row: dict[str, Any] = {}
+    for field in selected:
+        if field == "teams":
+            row["teams"] = teams
+        elif field == "teamPermissionKeys":
+            row["teamPermissionKeys"] = normalize_permission_key_list(teams, strict=False)
+        elif field == "effectivePermissions":
+            row["effectivePermissions"] = permissions if permissions is not None else effective_user_permissions(user, teams)
+        elif field == "avatar":
+            row["avatar"] = user.get("avatar")
+        else:
+            row[field] = user[field]
+    return row
 
 
 def issue_access_token(user: dict[str, Any]) -> str:
@@ -809,7 +1890,8 @@ def issue_access_token(user: dict[str, Any]) -> str:
         "sub": user["id"],
         "email": user["email"],
         "teams": user.get("teams", []),
-        "iat": int(now.timestamp()),
+        # Sub-second iat so a token issued just after a per-user revocation is not caught by its cutoff.
+        "iat": now.timestamp(),
         "exp": int((now + timedelta(minutes=ACCESS_TOKEN_TTL_MIN)).timestamp()),
         "jti": uuid4().hex,
     }
@@ -838,369 +1920,1723 @@ def clear_auth_cookie(response: Response) -> None:
 
 
 def find_user_by_username_or_email(username: str) -> dict[str, Any] | None:
-    normalized = username.strip().lower()
-    return next(
-        (
-            user
-            for user in USERS_DB
-            if user["username"].lower() == normalized or user["email"].split("@")[0].lower() == normalized
+    return USERS_DB.by_login(username.strip())
+
+
+# Revoked jtis and per-user cutoffs, each filed under the 60s bucket in which it stops mattering (the token's
+# exp, or the last exp a token issued before the cutoff can have). Checks are two dict lookups; whole buckets
+# are dropped once their time has passed.
+class TokenRevocationStore:
+    BUCKET_S = 60
+
+    def __init__(self, log_path: str = ""):
+        self._jtis: dict[str, float] = {}
+        # user id -> (revoked_at, expires); tokens issued at or before revoked_at are rejected.
+        self._users: dict[str, tuple[float, float]] = {}
+        self._buckets: dict[int, list[tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+        self._log_path = log_path
+        self._log_inode: int | None = None
+        self._log_offset = 0
+        self._next_sync = 0.0
+        # Compact only once the log is twice its live size, so a large live set is not rewritten on every append.
+        self._compact_at = TOKEN_REVOCATION_LOG_MAX_BYTES
+
+    def is_revoked(self, jti: str, user_id: str, issued_at: float) -> bool:
+        if self._log_path and time.monotonic() >= self._next_sync:
+            self.sync()
+        if jti in self._jtis:
+            return True
+        cutoff = self._users.get(user_id)
+        return cutoff is not None and issued_at <= cutoff[0]
+
+    def revoke(self, jti: str, expires: float) -> None:
+        self.sweep()
+        if self._apply("j", jti, expires, expires):
+            self._append(f"j\t{jti}\t{expires}\t{expires}\n")
+
+    def revoke_user(self, user_id: str) -> None:
+        revoked_at = time.time()
+        expires = revoked_at + ACCESS_TOKEN_TTL_MIN * 60
+        self.sweep()
+        if self._apply("u", user_id, revoked_at, expires):
+            self._append(f"u\t{user_id}\t{revoked_at}\t{expires}\n")
+
+    def _apply(self, kind: str, key: str, value: float, expires: float) -> bool:
+        if expires <= time.time():
+            return False
+        with self._lock:
+            if kind == "j":
+                self._jtis[key] = max(expires, self._jtis.get(key, 0.0))
+            else:
+                previous = self._users.get(key, (0.0, 0.0))
+                self._users[key] = (max(value, previous[0]), max(expires, previous[1]))
+            self._buckets.setdefault(int(expires // self.BUCKET_S) + 1, []).append((kind, key))
+        return True
+
+    def sweep(self, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            for bucket in [bucket for bucket in self._buckets if bucket * self.BUCKET_S <= now]:
+                for kind, key in self._buckets.pop(bucket):
+                    # The key may have been re-filed under a later bucket; only drop it once that has passed too.
+                    if kind == "j":
+                        if self._jtis.get(key, now) <= now:
+                            self._jtis.pop(key, None)
+                    elif self._users.get(key, (0.0, now))[1] <= now:
+                        self._users.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._jtis) + len(self._users)
+
+    def _append(self, line: str) -> None:
+        if not self._log_path:
+            return
+        # Shared between appenders but exclusive against compact(), so a line can never land in a log that
+        # compact() has already read and is about to replace.
+        lock_fd = os.open(f"{self._log_path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_SH)
+            fd = os.open(self._log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line.encode("utf-8"))
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+        finally:
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            os.close(lock_fd)
+        if size > self._compact_at:
+            self.compact()
+
+    def sync(self) -> None:
+        self._next_sync = time.monotonic() + TOKEN_REVOCATION_SYNC_S
+        try:
+            with open(self._log_path, "rb") as handle:
+                stat = os.fstat(handle.fileno())
+                if stat.st_ino != self._log_inode or stat.st_size < self._log_offset:
+                    # Compacted or replaced by another worker; replaying from the start is idempotent.
+                    self._log_inode, self._log_offset = stat.st_ino, 0
+                handle.seek(self._log_offset)
+                data = handle.read()
+        except FileNotFoundError:
+            return
+        # A write may be in flight; leave a trailing partial line for the next sync.
+        complete = data[: data.rfind(b"\n") + 1]
+        self._log_offset += len(complete)
+        for line in complete.decode("utf-8", "replace").splitlines():
+            kind, _, rest = line.partition("\t")
+            key, _, rest = rest.partition("\t")
+            value, _, expires = rest.partition("\t")
+            try:
+                self._apply(kind, key, float(value), float(expires))
+            except ValueError:
+                continue
+        self.sweep()
+
+    def compact(self) -> None:
+        lock_fd = os.open(f"{self._log_path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            self.sync()
+            with self._lock:
+                lines = [f"j\t{jti}\t{expires}\t{expires}\n" for jti, expires in self._jtis.items()]
+                lines += [f"u\t{user_id}\t{cutoff[0]}\t{cutoff[1]}\n" for user_id, cutoff in self._users.items()]
+            temp_path = f"{self._log_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                handle.writelines(lines)
+            os.replace(temp_path, self._log_path)
+            self._compact_at = max(TOKEN_REVOCATION_LOG_MAX_BYTES, 2 * sum(len(line) for line in lines))
+        finally:
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            os.close(lock_fd)
+
+
+TOKEN_REVOCATIONS = TokenRevocationStore(TOKEN_REVOCATION_LOG_PATH)
+
+
+def revoke_token(token: str | None) -> bool:
+    if not token:
+        return False
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
+    except jwt.InvalidTokenError:
+        return False
+    jti = payload.get("jti")
+    if not jti:
+        return False
+    TOKEN_REVOCATIONS.revoke(str(jti), float(payload.get("exp") or 0))
+    invalidate_token_cache(token=token)
+    return True
+
+
+# sha256(token) -> (user, exp, jti, iat). Only verified tokens are cached, and an entry never outlives its token.
+_TOKEN_CACHE: OrderedDict[bytes, tuple[dict[str, Any], float, str, float]] = OrderedDict()
+_TOKEN_CACHE_LOCK = threading.Lock()
+
+
+def invalidate_token_cache(user_id: str | None = None, token: str | None = None) -> None:
+    with _TOKEN_CACHE_LOCK:
+        if token is not None:
+            _TOKEN_CACHE.pop(hashlib.sha256(token.encode("utf-8")).digest(), None)
+            return
+        if user_id is None:
+            _TOKEN_CACHE.clear()
+            return
+        for digest in [digest for digest, cached in _TOKEN_CACHE.items() if cached[0]["id"] == user_id]:
+            del _TOKEN_CACHE[digest]
+
+
+def validate_token(token: str) -> dict[str, Any] | None:
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    with _TOKEN_CACHE_LOCK:
+        cached = _TOKEN_CACHE.get(digest)
+        if cached is not None:
+            if cached[1] > time.time():
+                _TOKEN_CACHE.move_to_end(digest)
+            else:
+                del _TOKEN_CACHE[digest]
+                cached = None
+    if cached is not None:
+        user, _exp, jti, issued_at = cached
+        return None if TOKEN_REVOCATIONS.is_revoked(jti, user["id"], issued_at) else user
+
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
+    except jwt.InvalidTokenError:
+        return None
+
+    user_id = payload.get("sub")
+    if not user_id:
+        return None
+
+    jti = str(payload.get("jti") or "")
+    issued_at = float(payload.get("iat") or 0)
+    if TOKEN_REVOCATIONS.is_revoked(jti, user_id, issued_at):
+        return None
+
+    user = USERS_DB.get(user_id)
+    if user is not None and TOKEN_CACHE_MAX_ENTRIES > 0:
+        with _TOKEN_CACHE_LOCK:
+            _TOKEN_CACHE[digest] = (user, float(payload.get("exp") or 0), jti, issued_at)
+            while len(_TOKEN_CACHE) > TOKEN_CACHE_MAX_ENTRIES:
+                _TOKEN_CACHE.popitem(last=False)
+    return user
+
+
+def request_token(cookie_header: str | None, authorization: str | None) -> str | None:
+    token = cookie_parser(cookie_header).get(ACCESS_COOKIE_NAME) if cookie_header else None
+    if not token:
+        auth = authorization or ""
+        if auth.lower().startswith("bearer "):
+            token = auth[7:].strip()
+    return token or None
+
+
+def current_user_from_request(request: Request) -> dict[str, Any] | None:
+    token = request_token(request.headers.get("cookie"), request.headers.get("authorization"))
+    if not token:
+        return None
+    return validate_token(token)
+
+
+# Resolved once per request by auth_middleware; teams and permissions are derived on first use.
+class AuthContext:
+    __slots__ = ("user", "_teams", "_permissions")
+
+    def __init__(self, user: dict[str, Any]):
+        self.user = user
+        self._teams: list[str] | None = None
+        self._permissions: list[str] | None = None
+
+    @property
+    def is_admin(self) -> bool:
+        return is_admin_user(self.user)
+
+    @property
+    def teams(self) -> list[str]:
+        if self._teams is None:
+            self._teams = effective_user_teams(self.user)
+        return self._teams
+
+    @property
+    def permissions(self) -> list[str]:
+        if self._permissions is None:
+            self._permissions = effective_user_permissions(self.user, self.teams)
+        return self._permissions
+
+    def public(self) -> dict[str, Any]:
+        return public_user(self.user, teams=self.teams, permissions=self.permissions)
+
+
+def resolve_auth_context(request: Request) -> AuthContext | None:
+    user = current_user_from_request(request)
+    return AuthContext(user) if user else None
+
+
+def get_auth_context(request: Request) -> AuthContext | None:
+    try:
+        return request.state.auth
+    except AttributeError:
+        # Requests that bypassed the middleware (OPTIONS, mounted apps) resolve lazily.
+        request.state.auth = resolve_auth_context(request)
+        return request.state.auth
+
+
+def require_auth_context(auth: AuthContext | None = Depends(get_auth_context)) -> AuthContext:
+    if auth is None:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return auth
+
+
+def require_admin_context(auth: AuthContext = Depends(require_auth_context)) -> AuthContext:
+    if not auth.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return auth
+
+
+def auth_session_payload(auth: AuthContext, auth_mode: str) -> dict[str, Any]:
+    return {
+        "user": auth.public(),
+        "authMode": auth_mode,
+        "teams": auth.teams,
+        "permissions": auth.permissions,
+    }
+
+
+def auth_team_permissions(request: Request, auth: AuthContext, teams: list[str] | None = None) -> dict[str, Any]:
+    if auth.is_admin:
+        return {"teams": auth.teams, "permissions": auth.permissions}
+    team_list = parse_team_list(request, teams)
+    if not team_list:
+        return {"teams": auth.teams, "permissions": auth.permissions}
+    return {"teams": team_list, "permissions": effective_user_permissions(auth.user, team_list)}
+
+
+def parse_query_list(request: Request, keys: set[str]) -> list[str]:
+    values: list[str] = []
+    for key, value in request.query_params.multi_items():
+        if key not in keys:
+            continue
+        for item in str(value or "").replace("\n", ",").split(","):
+            normalized = item.strip()
+            if normalized:
+                values.append(normalized)
+    return values
+
+
+def parse_team_list(request: Request, teams: list[str] | None = None) -> list[str]:
+    model = PERMISSION_MODEL
+
+    def normalize_team(value: str) -> str | None:
+        normalized = str(value or "").strip()
+        if not normalized:
+            return None
+        if normalized in model.team_bits:
+            return normalized
+        return model.team_by_flag.get(normalized.lower())
+
+    raw_team_values = [str(team).strip() for team in (teams or []) if str(team).strip()]
+    if not raw_team_values:
+        raw_team_values = parse_query_list(request, {"teams", "teams[]"})
+
+    normalized_teams: list[str] = []
+    for team_value in raw_team_values:
+        normalized = normalize_team(team_value)
+        if normalized and normalized not in normalized_teams:
+            normalized_teams.append(normalized)
+    return normalized_teams
+
+
+def build_team_access_map(team_list: list[str]) -> dict[str, bool]:
+    if not TEAM_PERMISSION_FLAGS:
+        return {}
+    enabled = {str(team).strip() for team in team_list if str(team).strip()}
+    return {
+        flag: team in enabled
+        for team, flag in TEAM_PERMISSION_FLAGS.items()
+    }
+
+
+PUBLIC_PATHS = {
+    "/health",
+    "/health/startup",
+    "/demo/ui-urls",
+    "/login/local",
+    "/auth_upload",
+    "/auth/login/local",
+    "/auth/login/adfs",
+    "/auth/session",
+    "/auth/permissions",
+}
+
+
+def cors_error_headers(origin: str | None) -> dict[str, str]:
+    # Errors sent before CORSMiddleware runs still need its headers, or browsers hide the status.
+    if origin not in ALLOWED_ORIGINS:
+        return {}
+    return {
+        "Access-Control-Allow-Origin": origin,
+        "Access-Control-Allow-Credentials": "true",
+        "Vary": "Origin",
+    }
+
+
+# Raw ASGI gate: no Request object or BaseHTTPMiddleware task per request. The resolved AuthContext
+# travels downstream in scope["state"]["auth"], which is what request.state.auth reads.
+class AuthMiddleware:
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        cookie_header = authorization = origin = None
+        for key, value in scope["headers"]:
+            if key == b"cookie":
+                cookie_header = cookie_header or value.decode("latin-1")
+            elif key == b"authorization":
+                authorization = authorization or value.decode("latin-1")
+            elif key == b"origin":
+                origin = origin or value.decode("latin-1")
+
+        token = request_token(cookie_header, authorization)
+        user = validate_token(token) if token else None
+        auth = AuthContext(user) if user else None
+        scope.setdefault("state", {})["auth"] = auth
+
+        path = scope["path"]
+        if auth is None and path not in PUBLIC_PATHS and not path.startswith("/auth_check/"):
+            response = JSONResponse(status_code=401, content={"detail": "Unauthorized"}, headers=cors_error_headers(origin))
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+def parse_rate_limits(value: str) -> dict[str, tuple[float, float]]:
+    limits: dict[str, tuple[float, float]] = {}
+    for item in value.split(","):
+        name, _, spec = item.partition("=")
+        name = name.strip().lower()
+        if not name:
+            continue
+        requests, _, seconds = spec.partition("/")
+        try:
+            capacity, period = float(requests), float(seconds)
+        except ValueError:
+            raise ValueError(f"Invalid rate limit spec: {item.strip()!r}") from None
+        if capacity < 1 or period <= 0:
+            raise ValueError(f"Invalid rate limit spec: {item.strip()!r}")
+        limits[name] = (capacity, capacity / period)
+    return limits
+
+
+RATE_LIMIT_CLASSES = parse_rate_limits(RATE_LIMITS)
+RATE_LIMIT_LOGIN_PATHS = {"/login/local", "/auth/login/local", "/auth/login/adfs", "/auth_upload"}
+RATE_LIMIT_COMMAND_PATHS = {"/multi_command"}
+
+
+def rate_limit_route_class(path: str) -> str:
+    if path in RATE_LIMIT_LOGIN_PATHS:
+        return "login"
+    if path in RATE_LIMIT_COMMAND_PATHS:
+        return "command"
+    if path in HERZI_CONTRACT_HANDLERS or path.startswith("/herzi/"):
+        return "contract"
+    return "default"
+
+
+def rate_limit_idle_after(limits: dict[str, tuple[float, float]]) -> float:
+    # A bucket left alone this long has refilled completely, so dropping it loses nothing.
+    return max((capacity / rate for capacity, rate in limits.values()), default=0.0)
+
+
+def take_bucket_token(tokens: float, updated: float, now: float, capacity: float, rate: float) -> tuple[float, float]:
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryRateLimitBackend:
+    blocking = False
+
+    def __init__(self, idle_after_s: float):
+        # key -> [tokens, updated]; kept in last-touched order so idle buckets collect at the front.
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._idle_after_s = idle_after_s
+
+    def take(self, key: str, capacity: float, rate: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [capacity, now]
+            else:
+                self._buckets.move_to_end(key)
+            bucket[0], retry_after = take_bucket_token(bucket[0], bucket[1], now, capacity, rate)
+            bucket[1] = now
+            # Each bucket is evicted at most once per insertion, so cleanup is O(1) amortized.
+            while self._buckets:
+                oldest = next(iter(self._buckets.values()))
+                if now - oldest[1] < self._idle_after_s:
+                    break
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# Local stand-in for a networked store such as Redis: a fixed table of (key hash, tokens, updated) slots in a
+# file every worker maps, serialized with flock. Idle slots are reclaimed in place, so the file never grows.
+_RATE_LIMIT_SLOT = struct.Struct("<Qdd")
+_RATE_LIMIT_PROBES = 8
+
+
+class SharedFileRateLimitBackend:
+    blocking = True
+
+    def __init__(self, path: str, slots: int, idle_after_s: float):
+        self._path = path
+        self._slots = max(_RATE_LIMIT_PROBES, slots)
+        self._idle_after_s = idle_after_s
+        self._map: mmap.mmap | None = None
+        self._fd = -1
+        self._pid = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> mmap.mmap:
+        # Mapped on first use in each worker, never inherited across fork.
+        if self._map is None or self._pid != os.getpid():
+            fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+            size = self._slots * _RATE_LIMIT_SLOT.size
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_size != size:
+                    os.ftruncate(fd, size)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._map, self._fd, self._pid = mmap.mmap(fd, size), fd, os.getpid()
+        return self._map
+
+    def take(self, key: str, capacity: float, rate: float) -> float:
+        digest = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
+        now = time.time()
+        with self._lock:
+            table = self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                slot = None
+                oldest_slot, oldest_updated = 0, math.inf
+                for probe in range(_RATE_LIMIT_PROBES):
+                    at = ((digest + probe) % self._slots) * _RATE_LIMIT_SLOT.size
+                    owner, tokens, updated = _RATE_LIMIT_SLOT.unpack_from(table, at)
+                    if owner == digest:
+                        slot = (at, tokens, updated)
+                        break
+                    if updated < oldest_updated:
+                        oldest_slot, oldest_updated = at, updated
+                if slot is None:
+                    # Reuse the stalest probed slot; a full table only costs its least recently used bucket.
+                    slot = (oldest_slot, capacity, now)
+                at, tokens, updated = slot
+                if now - updated >= self._idle_after_s:
+                    tokens = capacity
+                tokens, retry_after = take_bucket_token(tokens, updated, now, capacity, rate)
+                _RATE_LIMIT_SLOT.pack_into(table, at, digest, tokens, now)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return retry_after
+
+
+RATE_LIMIT_BACKENDS: dict[str, Any] = {
+    "memory": lambda idle_after_s: MemoryRateLimitBackend(idle_after_s),
+    "shared": lambda idle_after_s: SharedFileRateLimitBackend(RATE_LIMIT_SHARED_PATH, RATE_LIMIT_SHARED_SLOTS, idle_after_s),
+}
+
+
+def client_address(scope: dict[str, Any]) -> str:
+    # Behind the router this is the real client only when uvicorn runs with --proxy-headers and
+    # FORWARDED_ALLOW_IPS covers the router; otherwise every caller shares the router's address.
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    def __init__(self, app: Any, limits: dict[str, tuple[float, float]] | None = None, backend: str | None = None):
+        self.app = app
+        self.limits = RATE_LIMIT_CLASSES if limits is None else limits
+        backend_name = backend or RATE_LIMIT_BACKEND
+        factory = RATE_LIMIT_BACKENDS.get(backend_name)
+        if factory is None:
+            raise ValueError(f"Unknown rate limit backend: {backend_name}")
+        self.backend = factory(rate_limit_idle_after(self.limits))
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or not self.limits:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = rate_limit_route_class(scope["path"])
+        limit = self.limits.get(route_class)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        auth = scope.get("state", {}).get("auth")
+        client = f"user:{auth.user['id']}" if auth is not None else f"ip:{client_address(scope)}"
+        key = f"{route_class}|{client}"
+        if self.backend.blocking:
+            # flock can wait on another worker; keep it off the event loop.
+            retry_after = await asyncio.to_thread(self.backend.take, key, *limit)
+        else:
+            retry_after = self.backend.take(key, *limit)
+        if retry_after > 0:
+            origin = next((value.decode("latin-1") for key, value in scope["headers"] if key == b"origin"), None)
+            headers = {**cors_error_headers(origin), "Retry-After": str(max(1, math.ceil(retry_after)))}
+            response = JSONResponse(status_code=429, content={"detail": "Too many requests"}, headers=headers)
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+# Starlette runs the last added middleware first: auth resolves the user, then the limiter keys buckets by it.
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(AuthMiddleware)
+
+
+def iter_inventory(snapshot: InventorySnapshot | None = None):
+    state = snapshot or current_inventory()
+    for vc_name, vc_data in state.tree.items():
+        vc_meta = state.vc_meta.get(vc_name, {})
+        for cluster_name, cluster_data in vc_data.items():
+            yield vc_name, vc_meta, cluster_name, cluster_data
+
+
+def _object_url(kind: str, item: dict[str, Any], name_field: str, cluster_name: str, cluster_field: str | None) -> str:
+    cluster = (item.get(cluster_field) if cluster_field else None) or cluster_name
+    return str(item.get("url") or "").strip() or build_demo_object_url(kind, item.get("vc"), cluster, item.get(name_field))
+
+
+# Per-field row builders; a projection only runs the builders of the requested fields.
+DATASTORE_ROW_FIELDS: dict[str, Any] = {
+    "name": lambda ds, _cluster: ds["name"],
+    "vc": lambda ds, _cluster: ds["vc"],
+    "ds_cluster": lambda ds, _cluster: ds["ds_cluster"],
+    "size": lambda ds, _cluster: ds["size"],
+    "url": lambda ds, cluster: _object_url("datastores", ds, "name", cluster, "ds_cluster"),
+}
+ESX_ROW_FIELDS: dict[str, Any] = {
+    "name": lambda esx, _cluster: esx["name"],
+    "vc": lambda esx, _cluster: esx["vc"],
+    "esx_cluster": lambda esx, _cluster: esx["esx_cluster"],
+    "pwwns": lambda esx, _cluster: esx["pwwns"],
+    "url": lambda esx, cluster: _object_url("esx", esx, "name", cluster, "esx_cluster"),
+}
+RDM_ROW_FIELDS: dict[str, Any] = {
+    "naa": lambda rdm, _cluster: rdm["naa"],
+    "vc": lambda rdm, _cluster: rdm["vc"],
+    "esx_cluster": lambda rdm, _cluster: rdm["esx_cluster"],
+    "size": lambda rdm, _cluster: rdm["size"],
+    "connected": lambda rdm, _cluster: rdm["connected"],
+    "url": lambda rdm, cluster: _object_url("rdms", rdm, "naa", cluster, "esx_cluster"),
+}
+VM_ROW_FIELDS: dict[str, Any] = {
+    "name": lambda vm, _cluster: vm["name"],
+    "naas_of_rdms": lambda vm, _cluster: vm["naas_of_rdms"],
+    "datastore": lambda vm, _cluster: vm["datastore"],
+    "vc": lambda vm, _cluster: vm["vc"],
+    "url": lambda vm, cluster: _object_url("vms", vm, "name", cluster, None),
+}
+FLAT_VIEW_FIELDS: dict[str, tuple[str, dict[str, Any]]] = {
+    "datastores": ("datastores", DATASTORE_ROW_FIELDS),
+    "esx": ("esx", ESX_ROW_FIELDS),
+    "rdms": ("rdms", RDM_ROW_FIELDS),
+    "vms": ("vms", VM_ROW_FIELDS),
+}
+
+
+def flatten_inventory(
+    view_name: str,
+    fields: tuple[str, ...] | None = None,
+    snapshot: InventorySnapshot | None = None,
+) -> list[dict[str, Any]]:
+    section, row_fields = FLAT_VIEW_FIELDS[view_name]
+    builders = [(field, row_fields[field]) for field in (fields or row_fields)]
+    rows: list[dict[str, Any]] = []
+    for _vc_name, _vc_meta, cluster_name, cluster_data in iter_inventory(snapshot):
+        for item in cluster_data.get(section, {}).values():
+            rows.append({field: build(item, cluster_name) for field, build in builders})
+    return rows
+
+
+def flat_row(view_name: str, item: dict[str, Any], cluster_name: str) -> dict[str, Any]:
+    _section, row_fields = FLAT_VIEW_FIELDS[view_name]
+    return {field: build(item, cluster_name) for field, build in row_fields.items()}
+
+
+def flatten_datastores(fields: tuple[str, ...] | None = None) -> list[dict[str, Any]]:
+    return flatten_inventory("datastores", fields)
+
+
+def flatten_esx_hosts(fields: tuple[str, ...] | None = None) -> list[dict[str, Any]]:
+    return flatten_inventory("esx", fields)
+
+
+def flatten_rdms(fields: tuple[str, ...] | None = None) -> list[dict[str, Any]]:
+    return flatten_inventory("rdms", fields)
+
+
+def flatten_vms(fields: tuple[str, ...] | None = None) -> list[dict[str, Any]]:
+    return flatten_inventory("vms", fields)
+
+
+def parse_fields_param(request: Request, allowed: Any) -> tuple[str, ...] | None:
+    requested = set(parse_query_list(request, {"fields", "fields[]"}))
+    if not requested:
+        return None
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    # Canonical order keeps one cache entry per field set regardless of how the client ordered them.
+    return tuple(field for field in allowed if field in requested)
+
+
+def project_row(row: dict[str, Any], fields: tuple[str, ...] | None) -> dict[str, Any]:
+    if fields is None:
+        return row
+    return {field: row[field] for field in fields if field in row}
+
+
+def nested_datastore_entry(vc_name: str, cluster_name: str, ds_name: str, ds: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "cluster": ds.get("ds_cluster") or cluster_name,
+        "size": ds.get("size"),
+        "url": str(ds.get("url") or "").strip() or build_demo_object_url(
+            "datastores",
+            vc_name,
+            ds.get("ds_cluster") or cluster_name,
+            ds_name,
         ),
-        None,
+    }
+
+
+def nested_esx_entry(vc_name: str, cluster_name: str, esx_name: str, esx: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "pwwns": esx.get("pwwns", []),
+        "url": str(esx.get("url") or "").strip() or build_demo_object_url(
+            "esx",
+            vc_name,
+            esx.get("esx_cluster") or cluster_name,
+            esx_name,
+        ),
+    }
+
+
+def nested_rdm_entry(vc_name: str, cluster_name: str, naa: str, rdm: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "size": rdm.get("size"),
+        "connected": bool(rdm.get("connected")),
+        "url": str(rdm.get("url") or "").strip() or build_demo_object_url(
+            "rdms",
+            vc_name,
+            rdm.get("esx_cluster") or cluster_name,
+            naa,
+        ),
+    }
+
+
+def nested_vm_entry(vc_name: str, cluster_name: str, vm_name: str, vm: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "naas_of_rdms": vm.get("naas_of_rdms", []),
+        "datastore": vm.get("datastore", ""),
+        "url": str(vm.get("url") or "").strip() or build_demo_object_url(
+            "vms",
+            vc_name,
+            cluster_name,
+            vm_name,
+        ),
+    }
+
+
+# kind -> (tree section, entry builder, export key column, export columns)
+NESTED_EXPORTS: dict[str, tuple[str, Any, str, list[str]]] = {
+    "datastores": ("datastores", nested_datastore_entry, "name", ["vc", "cluster", "name", "size", "url"]),
+    "esx": ("esx", nested_esx_entry, "name", ["vc", "cluster", "name", "pwwns", "url"]),
+    "rdms": ("rdms", nested_rdm_entry, "naa", ["vc", "cluster", "naa", "size", "connected", "url"]),
+    "vms": ("vms", nested_vm_entry, "name", ["vc", "cluster", "name", "naas_of_rdms", "datastore", "url"]),
+}
+
+
+def build_nested_view(
+    kind: str,
+    snapshot: InventorySnapshot | None = None,
+) -> dict[str, dict[str, dict[str, dict[str, Any]]]]:
+    section, build_entry, _key_column, _columns = NESTED_EXPORTS[kind]
+    rows: dict[str, dict[str, dict[str, dict[str, Any]]]] = {}
+    for vc_name, _vc_meta, cluster_name, cluster_data in iter_inventory(snapshot):
+        vc_bucket = rows.setdefault(vc_name, {})
+        cluster_bucket = vc_bucket.setdefault(cluster_name, {})
+        for object_name, item in cluster_data.get(section, {}).items():
+            cluster_bucket[object_name] = build_entry(vc_name, cluster_name, object_name, item)
+    return rows
+
+
+def nested_datastores() -> dict[str, dict[str, dict[str, dict[str, Any]]]]:
+    return build_nested_view("datastores")
+
+
+def nested_esx_hosts() -> dict[str, dict[str, dict[str, dict[str, Any]]]]:
+    return build_nested_view("esx")
+
+
+def nested_rdms() -> dict[str, dict[str, dict[str, dict[str, Any]]]]:
+    return build_nested_view("rdms")
+
+
+def nested_vms() -> dict[str, dict[str, dict[str, dict[str, Any]]]]:
+    return build_nested_view("vms")
+
+
+def iter_export_rows(kind: str, snapshot: InventorySnapshot | None = None):
+    # Flat rows for the streaming export; for datastores "cluster" is the DS cluster, as in the nested view.
+    section, build_entry, key_column, _columns = NESTED_EXPORTS[kind]
+    for vc_name, _vc_meta, cluster_name, cluster_data in iter_inventory(snapshot):
+        for object_name, item in cluster_data.get(section, {}).items():
+            row = {"vc": vc_name, "cluster": cluster_name, key_column: object_name}
+            row.update(build_entry(vc_name, cluster_name, object_name, item))
+            yield row
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return ";".join(str(item) for item in value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+def iter_export_chunks(kind: str, export_format: str, snapshot: InventorySnapshot | None = None):
+    # Rows are buffered into ~EXPORT_CHUNK_BYTES chunks so the ASGI send count stays low.
+    _section, _build_entry, _key_column, columns = NESTED_EXPORTS[kind]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n") if export_format == "csv" else None
+    if writer is not None:
+        writer.writerow(columns)
+
+    for row in iter_export_rows(kind, snapshot):
+        if writer is not None:
+            writer.writerow([_csv_cell(row.get(column)) for column in columns])
+        else:
+            buffer.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")))
+            buffer.write("\n")
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def download_response(request: Request, kind: str, export_format: str | None) -> Response:
+    view_name = f"nested_{kind}"
+    if not export_format or export_format.strip().lower() == "json":
+        return inventory_json_response(request, view_name, lambda state: inventory_view(view_name, snapshot=state))
+
+    normalized = export_format.strip().lower()
+    if normalized not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid format. Expected 'json', 'ndjson' or 'csv'.")
+
+    # The generator holds on to this snapshot, so a refresh mid-export cannot mix two versions.
+    snapshot = current_inventory()
+    return StreamingResponse(
+        iter_export_chunks(kind, normalized, snapshot),
+        media_type=EXPORT_MEDIA_TYPES[normalized],
+        headers={
+            "Content-Disposition": f'attachment; filename="{kind}.{normalized}"',
+            "X-Inventory-Version": str(snapshot.version),
+        },
+    )
+
+
+INVENTORY_VIEW_BUILDERS = {
+    "vms": lambda state, fields: flatten_inventory("vms", fields, state),
+    "datastores": lambda state, fields: flatten_inventory("datastores", fields, state),
+    "esx": lambda state, fields: flatten_inventory("esx", fields, state),
+    "rdms": lambda state, fields: flatten_inventory("rdms", fields, state),
+    "nested_vms": lambda state, _fields: build_nested_view("vms", state),
+    "nested_datastores": lambda state, _fields: build_nested_view("datastores", state),
+    "nested_esx": lambda state, _fields: build_nested_view("esx", state),
+    "nested_rdms": lambda state, _fields: build_nested_view("rdms", state),
+}
+
+
+def inventory_view(
+    view_name: str,
+    fields: tuple[str, ...] | None = None,
+    snapshot: InventorySnapshot | None = None,
+) -> Any:
+    # Materialized once per snapshot; fields only applies to the flat views and each projection is kept separately.
+    state = snapshot or current_inventory()
+    cache_key = ("view", view_name, fields)
+    value = state.views.get(cache_key)
+    if value is None:
+        value = INVENTORY_VIEW_BUILDERS[view_name](state, fields)
+        state.views[cache_key] = value
+    return value
+
+
+# Versions for non-inventory datasets served through the response cache; bump on mutation.
+DATA_VERSIONS: dict[str, int] = {
+    "netapps": 0,
+    "exch_volumes": 0,
+    "qtrees": 0,
+    "users": 0,
+    "catalogs": 0,
+}
+# Responses are per-user (cookie auth), so shared caches must never store them.
+# "no-cache" still lets the browser keep the body and revalidate with If-None-Match.
+CACHE_CONTROL_POLICIES = {
+    "inventory": "private, no-cache",
+    "users": "private, no-cache",
+    "reference": f"private, max-age={REFERENCE_CACHE_MAX_AGE_S}",
+    "catalog": f"private, max-age={CATALOG_CACHE_MAX_AGE_S}",
+}
+DATA_CACHE_POLICIES = {
+    "netapps": "reference",
+    "exch_volumes": "reference",
+    "qtrees": "reference",
+    "users": "users",
+    "catalogs": "catalog",
+}
+_RESPONSE_CACHE: dict[str, tuple[Any, bytes, bytes | None, str]] = {}
+
+
+def bump_data_version(name: str) -> None:
+    DATA_VERSIONS[name] = DATA_VERSIONS.get(name, 0) + 1
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_json_bytes(content: Any) -> bytes:
+    # Same encoding settings as starlette's JSONResponse.render.
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_json_default,
+    ).encode("utf-8")
+
+
+def accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, and the gzip variant tag shares the identity tag's hash.
+    opaque = etag.strip('"')
+    for candidate in header.split(","):
+        tag = candidate.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag == opaque or tag == f"{opaque}-gzip":
+            return True
+    return False
+
+
+def cached_json_response(
+    request: Request,
+    cache_key: str,
+    version: Any,
+    build,
+    headers: dict[str, str] | None = None,
+    cache_control: str | None = None,
+) -> Response:
+    entry = _RESPONSE_CACHE.get(cache_key)
+    if entry is None or entry[0] != version:
+        body = encode_json_bytes(build())
+        gzipped = gzip.compress(body, compresslevel=6) if len(body) >= RESPONSE_GZIP_MIN_BYTES else None
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        entry = (version, body, gzipped, etag)
+        _RESPONSE_CACHE[cache_key] = entry
+
+    _version, body, gzipped, etag = entry
+    response_headers = dict(headers or {})
+    if cache_control:
+        response_headers["Cache-Control"] = cache_control
+    use_gzip = gzipped is not None and accepts_gzip(request)
+    if gzipped is not None:
+        response_headers["Vary"] = "Accept-Encoding"
+    response_headers["ETag"] = f'{etag[:-1]}-gzip"' if use_gzip else etag
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=response_headers)
+
+    if use_gzip:
+        response_headers["Content-Encoding"] = "gzip"
+        body = gzipped
+    return Response(content=body, media_type="application/json", headers=response_headers)
+
+
+def inventory_json_response(request: Request, cache_key: str, build) -> Response:
+    # build(snapshot) must read only from the snapshot it is given so the body matches its version.
+    snapshot = current_inventory()
+    return cached_json_response(
+        request,
+        f"inventory:{cache_key}",
+        snapshot.version,
+        lambda: build(snapshot),
+        headers={"X-Inventory-Version": str(snapshot.version)},
+        cache_control=CACHE_CONTROL_POLICIES["inventory"],
+    )
+
+
+def data_json_response(request: Request, data_name: str, cache_key: str, build) -> Response:
+    return cached_json_response(
+        request,
+        f"{data_name}:{cache_key}",
+        DATA_VERSIONS.get(data_name, 0),
+        build,
+        cache_control=CACHE_CONTROL_POLICIES[DATA_CACHE_POLICIES.get(data_name, "users")],
     )
 
 
-def validate_token(token: str) -> dict[str, Any] | None:
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
-    except jwt.InvalidTokenError:
-        return None
+INVENTORY_LIST_SPECS: dict[str, dict[str, Any]] = {
+    "vms": {"key": "name", "sort": {"name", "vc", "datastore"}, "filter": {"name", "vc", "datastore"}},
+    "datastores": {
+        "key": "name",
+        "sort": {"name", "vc", "ds_cluster", "size"},
+        "filter": {"name", "vc", "ds_cluster"},
+    },
+    "esx": {"key": "name", "sort": {"name", "vc", "esx_cluster"}, "filter": {"name", "vc", "esx_cluster"}},
+    "rdms": {
+        "key": "naa",
+        "sort": {"naa", "vc", "esx_cluster", "size", "connected"},
+        "filter": {"naa", "vc", "esx_cluster", "connected"},
+    },
+}
+
+
+def _filter_token(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
 
-    user_id = payload.get("sub")
-    if not user_id:
-        return None
+def inventory_sort_key(row: Mapping, sort_field: str, key_field: str) -> tuple:
+    # Loaded rows may lack a field (None); those sort after every present value instead of raising TypeError.
+    value = row.get(sort_field)
+    return (value is None, "" if value is None else value, row.get(key_field) or "", row.get("vc") or "")
 
-    return next((user for user in USERS_DB if user["id"] == user_id), None)
 
+def inventory_sort_index(
+    view_name: str,
+    sort_field: str,
+    snapshot: InventorySnapshot,
+) -> tuple[list[tuple], list[dict[str, Any]]]:
+    # Rows pre-sorted by inventory_sort_key; keys[i] is the keyset position of rows[i].
+    cache_key = ("sort", view_name, sort_field)
+    cached = snapshot.views.get(cache_key)
+    if cached is not None:
+        return cached
 
-def current_user_from_request(request: Request) -> dict[str, Any] | None:
-    token = request.cookies.get(ACCESS_COOKIE_NAME)
-    if not token:
-        auth = request.headers.get("Authorization", "")
-        if auth.lower().startswith("bearer "):
-            token = auth[7:].strip()
-    if not token:
-        return None
-    return validate_token(token)
+    key_field = INVENTORY_LIST_SPECS[view_name]["key"]
+    decorated = sorted(
+        (inventory_sort_key(row, sort_field, key_field), row)
+        for row in inventory_view(view_name, snapshot=snapshot)
+    )
+    entry = ([key for key, _row in decorated], [row for _key, row in decorated])
+    snapshot.views[cache_key] = entry
+    return entry
 
 
-def parse_query_list(request: Request, keys: set[str]) -> list[str]:
-    values: list[str] = []
-    for key, value in request.query_params.multi_items():
-        if key not in keys:
-            continue
-        for item in str(value or "").replace("\n", ",").split(","):
-            normalized = item.strip()
-            if normalized:
-                values.append(normalized)
-    return values
+def inventory_filter_index(
+    view_name: str,
+    sort_field: str,
+    filter_field: str,
+    snapshot: InventorySnapshot,
+) -> dict[str, list[int]]:
+    # filter value -> ascending positions into the (view, sort field) order.
+    cache_key = ("filter", view_name, sort_field, filter_field)
+    cached = snapshot.views.get(cache_key)
+    if cached is not None:
+        return cached
 
+    _keys, rows = inventory_sort_index(view_name, sort_field, snapshot)
+    positions: dict[str, list[int]] = {}
+    for position, row in enumerate(rows):
+        positions.setdefault(_filter_token(row.get(filter_field)), []).append(position)
+    snapshot.views[cache_key] = positions
+    return positions
 
-def parse_team_list(request: Request, teams: list[str] | None = None) -> list[str]:
-    def normalize_team(value: str) -> str | None:
-        normalized = str(value or "").strip()
-        if not normalized:
-            return None
-        if normalized in TEAM_PERMISSIONS:
-            return normalized
 
-        lowered = normalized.lower()
-        for team_name, permission_flag in TEAM_PERMISSION_FLAGS.items():
-            if lowered == permission_flag.lower():
-                return team_name
-        return None
+def encode_page_cursor(key: tuple) -> str:
+    return base64.urlsafe_b64encode(encode_json_bytes(list(key))).decode("ascii").rstrip("=")
 
-    raw_team_values = [str(team).strip() for team in (teams or []) if str(team).strip()]
-    if not raw_team_values:
-        raw_team_values = parse_query_list(request, {"teams", "teams[]"})
 
-    normalized_teams: list[str] = []
-    for team_value in raw_team_values:
-        normalized = normalize_team(team_value)
-        if normalized and normalized not in normalized_teams:
-            normalized_teams.append(normalized)
-    return normalized_teams
+def decode_page_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    if not isinstance(value, list) or len(value) != 4 or not isinstance(value[0], bool):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return tuple(value)
 
 
-def build_team_access_map(team_list: list[str]) -> dict[str, bool]:
-    if not TEAM_PERMISSION_FLAGS:
-        return {}
-    enabled = {str(team).strip() for team in team_list if str(team).strip()}
+def inventory_page(
+    view_name: str,
+    *,
+    sort: str | None,
+    filters: list[tuple[str, str]],
+    limit: int | None,
+    cursor: str | None,
+    snapshot: InventorySnapshot | None = None,
+) -> dict[str, Any]:
+    state = snapshot or current_inventory()
+    spec = INVENTORY_LIST_SPECS[view_name]
+    sort_spec = str(sort or spec["key"]).strip()
+    descending = sort_spec.startswith("-")
+    sort_field = sort_spec.lstrip("-+")
+    if sort_field not in spec["sort"]:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort field: {sort_field}")
+
+    page_size = INVENTORY_PAGE_DEFAULT_LIMIT if limit is None else limit
+    if page_size < 1 or page_size > INVENTORY_PAGE_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {INVENTORY_PAGE_MAX_LIMIT}")
+
+    keys, rows = inventory_sort_index(view_name, sort_field, state)
+
+    positions: list[int] | None = None
+    if filters:
+        candidates = sorted(
+            (inventory_filter_index(view_name, sort_field, field, state).get(value, []) for field, value in filters),
+            key=len,
+        )
+        positions = candidates[0]
+        for other in candidates[1:]:
+            allowed = set(other)
+            positions = [position for position in positions if position in allowed]
+
+    # Keyset bound: ascending pages continue after the cursor key, descending pages before it.
+    if cursor:
+        cursor_key = decode_page_cursor(cursor)
+        try:
+            bound = bisect.bisect_left(keys, cursor_key) if descending else bisect.bisect_right(keys, cursor_key)
+        except TypeError as exc:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    else:
+        bound = len(keys) if descending else 0
+
+    if positions is None:
+        total = len(rows)
+        if descending:
+            selected = list(range(bound - 1, max(bound - page_size, 0) - 1, -1))
+            has_more = bound - page_size > 0
+        else:
+            selected = list(range(bound, min(bound + page_size, total)))
+            has_more = bound + page_size < total
+    else:
+        total = len(positions)
+        start = bisect.bisect_left(positions, bound)
+        if descending:
+            selected = positions[max(start - page_size, 0):start][::-1]
+            has_more = start - page_size > 0
+        else:
+            selected = positions[start:start + page_size]
+            has_more = start + page_size < total
+
     return {
-        flag: team in enabled
-        for team, flag in TEAM_PERMISSION_FLAGS.items()
+        "items": [rows[position] for position in selected],
+        "total": total,
+        "limit": page_size,
+        "sort": sort_spec,
+        "nextCursor": encode_page_cursor(keys[selected[-1]]) if has_more and selected else None,
+        "version": state.version,
     }
 
 
-PUBLIC_PATHS = {
-    "/health",
-    "/demo/ui-urls",
-    "/login/local",
-    "/auth_upload",
-    "/auth/login/local",
-    "/auth/login/adfs",
-    "/auth/session",
-    "/auth/permissions",
-}
+SEARCH_TYPES = ("vcenter", "vm", "datastore", "esx", "rdm", "netapp")
+SEARCH_INVENTORY_SECTIONS = (("vms", "vm"), ("datastores", "datastore"), ("esx", "esx"), ("rdms", "rdm"))
+_SEARCH_TOKEN_SPLIT = re.compile(r"[^0-9a-z]+")
+# Above this many added/removed entries a sync re-sorts the term lists instead of inserting one by one.
+_SEARCH_BULK_CHANGES = 2048
+# Prefix candidates examined per (type, index) scan, as a multiple of the result limit.
+_SEARCH_SCAN_FACTOR = 10
+_SEARCH_NO_TERMS: tuple[str, ...] = ()
+
+
+class SearchTermIndex:
+    # (term, entry id) pairs sorted as parallel lists: a prefix lookup is one bisect plus a scan of the matches.
+    # Ids are numbered in name order on rebuild, so equal terms come back alphabetically.
+    __slots__ = ("terms", "ids")
+
+    def __init__(self, pairs: list[tuple[str, int]] | None = None) -> None:
+        pairs = sorted(pairs or [])
+        self.terms = [term for term, _entry_id in pairs]
+        self.ids = [entry_id for _term, entry_id in pairs]
+
+    def _position(self, term: str, entry_id: int) -> int:
+        low = bisect.bisect_left(self.terms, term)
+        high = bisect.bisect_right(self.terms, term, low)
+        return bisect.bisect_left(self.ids, entry_id, low, high)
+
+    def add(self, term: str, entry_id: int) -> None:
+        position = self._position(term, entry_id)
+        self.terms.insert(position, term)
+        self.ids.insert(position, entry_id)
+
+    def remove(self, term: str, entry_id: int) -> None:
+        position = self._position(term, entry_id)
+        if position < len(self.ids) and self.terms[position] == term and self.ids[position] == entry_id:
+            del self.terms[position]
+            del self.ids[position]
+
+    def scan(self, prefix: str):
+        terms, ids = self.terms, self.ids
+        position = bisect.bisect_left(terms, prefix)
+        while position < len(terms) and terms[position].startswith(prefix):
+            yield terms[position], ids[position]
+            position += 1
+
+
+def search_entry_terms(entry: tuple) -> tuple[list[str], list[str]]:
+    # Whole names (and extra terms such as NetApp hosts) match by prefix; so does every later word of a name.
+    names = [sys.intern(term.lower()) for term in (entry[1], *entry[4]) if term]
+    tokens: list[str] = []
+    for name in names:
+        for token in _SEARCH_TOKEN_SPLIT.split(name)[1:]:
+            if token and token not in tokens and not name.startswith(token):
+                tokens.append(sys.intern(token))
+    return names, tokens
+
+
+class InventorySearchIndex:
+    # Entries are (type, name, vc, cluster, extra terms) tuples grouped by source ("inventory", "netapps").
+    # A sync diffs a group against its new entries, so unchanged objects are never re-tokenized.
+    # Removed entries leave a None hole in `entries` until the next bulk rebuild renumbers them.
+    def __init__(self) -> None:
+        self.entries: list[tuple | None] = []
+        self.entry_ids: dict[tuple, int] = {}
+        self.groups: dict[str, set[tuple]] = {}
+        self.versions: dict[str, Any] = {}
+        self.names = {search_type: SearchTermIndex() for search_type in SEARCH_TYPES}
+        self.tokens = {search_type: SearchTermIndex() for search_type in SEARCH_TYPES}
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+
+    def sync(self, group: str, version: Any, entries) -> None:
+        with self.sync_lock:
+            if self.versions.get(group) == version:
+                return
+            desired = set(entries)
+            current = self.groups.get(group, set())
+            removed = current - desired
+            added = desired - current
+            bulk = len(removed) + len(added) > _SEARCH_BULK_CHANGES
+            with self.lock:
+                for entry in removed:
+                    entry_id = self.entry_ids.pop(entry)
+                    self.entries[entry_id] = None
+                    if not bulk:
+                        names, tokens = search_entry_terms(entry)
+                        for term in names:
+                            self.names[entry[0]].remove(term, entry_id)
+                        for term in tokens:
+                            self.tokens[entry[0]].remove(term, entry_id)
+                for entry in sorted(added, key=lambda item: item[1].lower()):
+                    entry_id = len(self.entries)
+                    self.entries.append(entry)
+                    self.entry_ids[entry] = entry_id
+                    if not bulk:
+                        names, tokens = search_entry_terms(entry)
+                        for term in names:
+                            self.names[entry[0]].add(term, entry_id)
+                        for term in tokens:
+                            self.tokens[entry[0]].add(term, entry_id)
+                self.groups[group] = desired
+                self.versions[group] = version
+            if bulk:
+                self._rebuild()
+
+    def _rebuild(self) -> None:
+        # Sorting happens outside self.lock; queries keep using the old lists until the swap below.
+        entries: list[tuple | None] = sorted(
+            (entry for entry in self.entries if entry is not None),
+            key=lambda item: item[1].lower(),
+        )
+        entry_ids = {entry: entry_id for entry_id, entry in enumerate(entries)}
+        name_pairs: dict[str, list[tuple[str, int]]] = {search_type: [] for search_type in SEARCH_TYPES}
+        token_pairs: dict[str, list[tuple[str, int]]] = {search_type: [] for search_type in SEARCH_TYPES}
+        for entry_id, entry in enumerate(entries):
+            names, tokens = search_entry_terms(entry)
+            name_pairs[entry[0]].extend((term, entry_id) for term in names)
+            token_pairs[entry[0]].extend((term, entry_id) for term in tokens)
+        names_index = {search_type: SearchTermIndex(pairs) for search_type, pairs in name_pairs.items()}
+        tokens_index = {search_type: SearchTermIndex(pairs) for search_type, pairs in token_pairs.items()}
+        with self.lock:
+            self.entries = entries
+            self.entry_ids = entry_ids
+            self.names = names_index
+            self.tokens = tokens_index
+
+    def search(self, query: str, limit: int, types: tuple[str, ...] = SEARCH_TYPES) -> list[dict[str, Any]]:
+        words = query.lower().split()
+        if not words:
+            return []
+        head, rest = words[0], words[1:]
+        # Each (type, index) scan stops after `limit` hits or `limit * _SEARCH_SCAN_FACTOR` candidates, whichever
+        # comes first, so cost is bounded by types * limit even when later words reject most prefix matches.
+        # A multi-word query can therefore miss matches that sort far past the first candidates.
+        matches: dict[int, tuple] = {}
+        with self.lock:
+            for search_type in types:
+                for index, base_rank in ((self.names[search_type], 1), (self.tokens[search_type], 2)):
+                    found = 0
+                    for term, entry_id in itertools.islice(index.scan(head), limit * _SEARCH_SCAN_FACTOR):
+                        entry = self.entries[entry_id]
+                        if entry is None or entry_id in matches:
+                            continue
+                        if rest:
+                            haystack = f"{entry[1]} {entry[2]} {entry[3]} {' '.join(entry[4])}".lower()
+                            if not all(word in haystack for word in rest):
+                                continue
+                        rank = 0 if base_rank == 1 and term == head else base_rank
+                        matches[entry_id] = (rank, term, SEARCH_TYPES.index(search_type), entry[1], entry)
+                        found += 1
+                        if found >= limit:
+                            break
+
+        ranked = sorted(matches.values(), key=lambda match: match[:4])[:limit]
+        return [
+            {"type": entry[0], "name": entry[1], "vc": entry[2], "cluster": entry[3], "match": term, "rank": rank}
+            for rank, term, _type_order, _name, entry in ranked
+        ]
 
 
-@app.middleware("http")
-async def auth_middleware(request: Request, call_next):
-    if request.method == "OPTIONS":
-        return await call_next(request)
+def iter_inventory_search_entries(snapshot: InventorySnapshot):
+    for vc_name, _vc_meta, cluster_name, cluster_data in iter_inventory(snapshot):
+        yield ("vcenter", vc_name, vc_name, "", _SEARCH_NO_TERMS)
+        for section, search_type in SEARCH_INVENTORY_SECTIONS:
+            for object_name in cluster_data.get(section, {}):
+                yield (search_type, object_name, vc_name, cluster_name, _SEARCH_NO_TERMS)
 
-    path = request.url.path
-    if path in PUBLIC_PATHS or path.startswith("/auth_check/"):
-        return await call_next(request)
 
-    if not current_user_from_request(request):
-        origin = request.headers.get("origin")
-        headers = {}
-        if origin in ALLOWED_ORIGINS:
-            headers = {
-                "Access-Control-Allow-Origin": origin,
-                "Access-Control-Allow-Credentials": "true",
-                "Vary": "Origin",
-            }
-        return JSONResponse(status_code=401, content={"detail": "Unauthorized"}, headers=headers)
+def iter_netapp_search_entries():
+    for machine in netapp_machines():
+        yield ("netapp", machine["name"], "", machine.get("cluster") or "", (machine.get("host") or "",))
 
-    return await call_next(request)
 
+INVENTORY_SEARCH = InventorySearchIndex()
 
-def iter_inventory():
-    for vc_name, vc_data in INVENTORY.items():
-        vc_meta = VC_META.get(vc_name, {})
-        for cluster_name, cluster_data in vc_data.items():
-            yield vc_name, vc_meta, cluster_name, cluster_data
 
+def sync_inventory_search(snapshot: InventorySnapshot | None = None) -> InventorySearchIndex:
+    state = snapshot or current_inventory()
+    INVENTORY_SEARCH.sync("inventory", state.version, iter_inventory_search_entries(state))
+    INVENTORY_SEARCH.sync("netapps", DATA_VERSIONS["netapps"], iter_netapp_search_entries())
+    return INVENTORY_SEARCH
 
-def flatten_datastores() -> list[dict[str, Any]]:
-    rows: list[dict[str, Any]] = []
-    for _vc_name, _vc_meta, _cluster_name, cluster_data in iter_inventory():
-        for ds in cluster_data.get("datastores", {}).values():
-            url = str(ds.get("url") or "").strip() or build_demo_object_url(
-                "datastores",
-                ds.get("vc"),
-                ds.get("ds_cluster") or _cluster_name,
-                ds.get("name"),
-            )
-            rows.append(
-                {
-                    "name": ds["name"],
-                    "vc": ds["vc"],
-                    "ds_cluster": ds["ds_cluster"],
-                    "size": ds["size"],
-                    "url": url,
-                }
-            )
-    return rows
 
+def _sync_inventory_search_on_swap(snapshot: InventorySnapshot, _previous: InventorySnapshot) -> None:
+    # Only keep the index current once something has searched; until then it is built on first use.
+    if INVENTORY_SEARCH.versions:
+        sync_inventory_search(snapshot)
 
-def flatten_esx_hosts() -> list[dict[str, Any]]:
-    rows: list[dict[str, Any]] = []
-    for _vc_name, _vc_meta, _cluster_name, cluster_data in iter_inventory():
-        for esx in cluster_data.get("esx", {}).values():
-            url = str(esx.get("url") or "").strip() or build_demo_object_url(
-                "esx",
-                esx.get("vc"),
-                esx.get("esx_cluster") or _cluster_name,
-                esx.get("name"),
-            )
-            rows.append(
-                {
-                    "name": esx["name"],
-                    "vc": esx["vc"],
-                    "esx_cluster": esx["esx_cluster"],
-                    "pwwns": esx["pwwns"],
-                    "url": url,
-                }
-            )
-    return rows
 
+INVENTORY_SWAP_HOOKS.append(_sync_inventory_search_on_swap)
 
-def flatten_rdms() -> list[dict[str, Any]]:
-    rows: list[dict[str, Any]] = []
-    for _vc_name, _vc_meta, _cluster_name, cluster_data in iter_inventory():
-        for rdm in cluster_data.get("rdms", {}).values():
-            url = str(rdm.get("url") or "").strip() or build_demo_object_url(
-                "rdms",
-                rdm.get("vc"),
-                rdm.get("esx_cluster") or _cluster_name,
-                rdm.get("naa"),
-            )
-            rows.append(
-                {
-                    "naa": rdm["naa"],
-                    "vc": rdm["vc"],
-                    "esx_cluster": rdm["esx_cluster"],
-                    "size": rdm["size"],
-                    "connected": rdm["connected"],
-                    "url": url,
-                }
-            )
-    return rows
 
+ROLLUP_COUNTERS = (
+    "vms",
+    "datastores",
+    "esx",
+    "rdms",
+    "connectedRdms",
+    "datastoreCapacity",
+    "rdmCapacity",
+    "connectedRdmCapacity",
+)
+ROLLUP_SECTIONS = ("vms", "datastores", "esx", "rdms")
+ROLLUP_GROUPS = ("vc", "cluster", "status", "location")
+
+
+def _rollup_size(item: Mapping) -> int | float:
+    size = item.get("size")
+    return size if isinstance(size, (int, float)) and not isinstance(size, bool) else 0
+
+
+def rollup_deltas(section: str, item: Mapping) -> list[tuple[str, int | float]]:
+    if section == "datastores":
+        return [("datastores", 1), ("datastoreCapacity", _rollup_size(item))]
+    if section == "rdms":
+        size = _rollup_size(item)
+        deltas = [("rdms", 1), ("rdmCapacity", size)]
+        if item.get("connected"):
+            deltas += [("connectedRdms", 1), ("connectedRdmCapacity", size)]
+        return deltas
+    return [(section, 1)]
+
+
+class InventoryRollups:
+    # Counters per (vc, tree cluster), per vc and for the whole estate; status/location roll up from the vc level.
+    __slots__ = ("clusters", "vcenters", "totals")
+
+    def __init__(self) -> None:
+        self.clusters: dict[tuple[str, str], dict[str, int | float]] = {}
+        self.vcenters: dict[str, dict[str, int | float]] = {}
+        self.totals: dict[str, int | float] = dict.fromkeys(ROLLUP_COUNTERS, 0)
+
+    def copy(self) -> "InventoryRollups":
+        # Shares the counter dicts with self; call own() before changing the counters of a vc or cluster.
+        rollups = InventoryRollups()
+        rollups.clusters = dict(self.clusters)
+        rollups.vcenters = dict(self.vcenters)
+        rollups.totals = dict(self.totals)
+        return rollups
+
+    def own(self, shared: "InventoryRollups", vc_name: str, cluster_name: str) -> None:
+        key = (vc_name, cluster_name)
+        if key in self.clusters and self.clusters[key] is shared.clusters.get(key):
+            self.clusters[key] = dict(self.clusters[key])
+        if vc_name in self.vcenters and self.vcenters[vc_name] is shared.vcenters.get(vc_name):
+            self.vcenters[vc_name] = dict(self.vcenters[vc_name])
+
+    def apply(self, vc_name: str, cluster_name: str, section: str, item: Mapping, sign: int) -> None:
+        cluster = self.clusters.get((vc_name, cluster_name))
+        if cluster is None:
+            cluster = self.clusters[(vc_name, cluster_name)] = dict.fromkeys(ROLLUP_COUNTERS, 0)
+        vcenter = self.vcenters.get(vc_name)
+        if vcenter is None:
+            vcenter = self.vcenters[vc_name] = dict.fromkeys(ROLLUP_COUNTERS, 0)
+        for counter, value in rollup_deltas(section, item):
+            cluster[counter] += sign * value
+            vcenter[counter] += sign * value
+            self.totals[counter] += sign * value
+
+    def apply_objects(self, vc_name: str, cluster_name: str, section: str, objects: Mapping, sign: int) -> None:
+        for item in objects.values():
+            self.apply(vc_name, cluster_name, section, item, sign)
+
+    def prune(self, keys: Iterable[tuple[str, str]] | None = None) -> None:
+        # Clusters and vCenters that lost their last object drop out instead of reporting zeros.
+        keys = list(self.clusters) if keys is None else list(keys)
+        for key in keys:
+            counters = self.clusters.get(key)
+            if counters is not None and not any(counters[name] for name in ROLLUP_SECTIONS):
+                del self.clusters[key]
+        for vc_name in {vc_name for vc_name, _cluster_name in keys}:
+            counters = self.vcenters.get(vc_name)
+            if counters is not None and not any(counters[name] for name in ROLLUP_SECTIONS):
+                del self.vcenters[vc_name]
+
+
+def build_inventory_rollups(snapshot: InventorySnapshot) -> InventoryRollups:
+    rollups = InventoryRollups()
+    for vc_name, _vc_meta, cluster_name, cluster_data in iter_inventory(snapshot):
+        for section in ROLLUP_SECTIONS:
+            rollups.apply_objects(vc_name, cluster_name, section, cluster_data.get(section, {}), 1)
+    rollups.prune()
+    return rollups
+
+
+def update_inventory_rollups(
+    rollups: InventoryRollups,
+    previous: dict[str, dict[str, Any]],
+    tree: dict[str, dict[str, Any]],
+    changes: set[tuple[str, str, str]],
+) -> InventoryRollups:
+    # Carries the previous snapshot's counters forward by applying only the added, removed and changed objects
+    # of the changed (section, vc, cluster) maps; unchanged clusters keep sharing the previous counters.
+    updated = rollups.copy()
+    touched: set[tuple[str, str]] = set()
+    for section, vc_name, cluster_name in changes:
+        if section not in ROLLUP_SECTIONS:
+            continue
+        old_objects = previous.get(vc_name, {}).get(cluster_name, {}).get(section, {})
+        new_objects = tree.get(vc_name, {}).get(cluster_name, {}).get(section, {})
+        if old_objects is new_objects:
+            continue
+        updated.own(rollups, vc_name, cluster_name)
+        touched.add((vc_name, cluster_name))
+        for key, item in old_objects.items():
+            current = new_objects.get(key)
+            if current is None or (current is not item and current != item):
+                updated.apply(vc_name, cluster_name, section, item, -1)
+        for key, item in new_objects.items():
+            former = old_objects.get(key)
+            if former is None or (former is not item and former != item):
+                updated.apply(vc_name, cluster_name, section, item, 1)
+    updated.prune(touched)
+    return updated
+
+
+def inventory_rollups(snapshot: InventorySnapshot | None = None) -> InventoryRollups:
+    state = snapshot or current_inventory()
+    rollups = state.views.get("rollups")
+    if rollups is None:
+        rollups = state.views["rollups"] = build_inventory_rollups(state)
+    return rollups
+
+
+def carry_inventory_rollups(snapshot: InventorySnapshot, previous: InventorySnapshot | None) -> None:
+    # Called with the snapshot being replaced in the same lineage (the global inventory or one shard). Like
+    # search, rollups are only maintained once something has read them; without a diff (a different source, or
+    # nothing read yet) they are rebuilt on the next read instead.
+    if previous is None or snapshot.changes is None:
+        return
+    rollups = previous.views.get("rollups")
+    if rollups is not None:
+        snapshot.views["rollups"] = update_inventory_rollups(rollups, previous.tree, snapshot.tree, snapshot.changes)
 
-def flatten_vms() -> list[dict[str, Any]]:
-    rows: list[dict[str, Any]] = []
-    for _vc_name, _vc_meta, _cluster_name, cluster_data in iter_inventory():
-        for vm in cluster_data.get("vms", {}).values():
-            url = str(vm.get("url") or "").strip() or build_demo_object_url(
-                "vms",
-                vm.get("vc"),
-                _cluster_name,
-                vm.get("name"),
-            )
-            rows.append(
-                {
-                    "name": vm["name"],
-                    "naas_of_rdms": vm["naas_of_rdms"],
-                    "datastore": vm["datastore"],
-                    "vc": vm["vc"],
-                    "url": url,
-                }
-            )
-    return rows
 
+INVENTORY_SWAP_HOOKS.append(carry_inventory_rollups)
 
-def nested_datastores() -> dict[str, dict[str, dict[str, dict[str, Any]]]]:
-    rows: dict[str, dict[str, dict[str, dict[str, Any]]]] = {}
-    for vc_name, _vc_meta, cluster_name, cluster_data in iter_inventory():
-        vc_bucket = rows.setdefault(vc_name, {})
-        cluster_bucket = vc_bucket.setdefault(cluster_name, {})
-        for ds_name, ds in cluster_data.get("datastores", {}).items():
-            cluster_bucket[ds_name] = {
-                "cluster": ds.get("ds_cluster") or cluster_name,
-                "size": ds.get("size"),
-                "url": str(ds.get("url") or "").strip() or build_demo_object_url(
-                    "datastores",
-                    vc_name,
-                    ds.get("ds_cluster") or cluster_name,
-                    ds_name,
-                ),
-            }
-    return rows
 
+def rollup_rows(snapshot: InventorySnapshot, group: str, vc: str | None = None) -> list[dict[str, Any]]:
+    rollups = inventory_rollups(snapshot)
+    if group == "cluster":
+        return [
+            {"vc": vc_name, "cluster": cluster_name, **counters}
+            for (vc_name, cluster_name), counters in sorted(rollups.clusters.items())
+            if vc is None or vc_name == vc
+        ]
+    if group == "vc":
+        return [
+            {"vc": vc_name, **counters}
+            for vc_name, counters in sorted(rollups.vcenters.items())
+            if vc is None or vc_name == vc
+        ]
 
-def nested_esx_hosts() -> dict[str, dict[str, dict[str, dict[str, Any]]]]:
-    rows: dict[str, dict[str, dict[str, dict[str, Any]]]] = {}
-    for vc_name, _vc_meta, cluster_name, cluster_data in iter_inventory():
-        vc_bucket = rows.setdefault(vc_name, {})
-        cluster_bucket = vc_bucket.setdefault(cluster_name, {})
-        for esx_name, esx in cluster_data.get("esx", {}).items():
-            cluster_bucket[esx_name] = {
-                "pwwns": esx.get("pwwns", []),
-                "url": str(esx.get("url") or "").strip() or build_demo_object_url(
-                    "esx",
-                    vc_name,
-                    esx.get("esx_cluster") or cluster_name,
-                    esx_name,
-                ),
-            }
-    return rows
+    meta_field = "status" if group == "status" else "location"
+    grouped: dict[str, dict[str, Any]] = {}
+    for vc_name, counters in rollups.vcenters.items():
+        if vc is not None and vc_name != vc:
+            continue
+        key = str(snapshot.vc_meta.get(vc_name, {}).get(meta_field) or "unknown")
+        row = grouped.get(key)
+        if row is None:
+            row = grouped[key] = {meta_field: key, "vcenters": 0, **dict.fromkeys(ROLLUP_COUNTERS, 0)}
+        row["vcenters"] += 1
+        for counter in ROLLUP_COUNTERS:
+            row[counter] += counters[counter]
+    return [grouped[key] for key in sorted(grouped)]
+
+
+# Lookup payload key -> flat view it resolves against.
+INVENTORY_LOOKUP_VIEWS = {"vms": "vms", "datastores": "datastores", "esx": "esx", "naas": "rdms"}
+
+
+def inventory_key_index(view_name: str, snapshot: InventorySnapshot) -> dict[str, list[dict[str, Any]]]:
+    # Normalized key -> flat rows; names are only unique per vCenter, so a key can resolve to several rows.
+    cache_key = ("key", view_name)
+    index = snapshot.views.get(cache_key)
+    if index is None:
+        key_field = INVENTORY_LIST_SPECS[view_name]["key"]
+        index = {}
+        for row in inventory_view(view_name, snapshot=snapshot):
+            index.setdefault(normalize_lookup_key(row.get(key_field)), []).append(row)
+        snapshot.views[cache_key] = index
+    return index
+
+
+def lookup_inventory_objects(requested: dict[str, list[str]], snapshot: InventorySnapshot) -> dict[str, Any]:
+    result: dict[str, Any] = {"version": snapshot.version, "missing": {}}
+    for kind, keys in requested.items():
+        index = inventory_key_index(INVENTORY_LOOKUP_VIEWS[kind], snapshot)
+        entries = []
+        missing = []
+        for key in keys:
+            matches = index.get(normalize_lookup_key(key), [])
+            entries.append({"key": key, "found": bool(matches), "matches": matches})
+            if not matches:
+                missing.append(key)
+        result[kind] = entries
+        result["missing"][kind] = missing
+    return result
+
+
+LUN_AUDIT_CATEGORIES = (
+    "unusedRdms",
+    "orphanedRdms",
+    "unknownNaaReferences",
+    "duplicateNaaReferences",
+    "vmsWithUnknownDatastore",
+)
 
 
-def nested_rdms() -> dict[str, dict[str, dict[str, dict[str, Any]]]]:
-    rows: dict[str, dict[str, dict[str, dict[str, Any]]]] = {}
-    for vc_name, _vc_meta, cluster_name, cluster_data in iter_inventory():
-        vc_bucket = rows.setdefault(vc_name, {})
-        cluster_bucket = vc_bucket.setdefault(cluster_name, {})
-        for naa, rdm in cluster_data.get("rdms", {}).items():
-            cluster_bucket[naa] = {
-                "size": rdm.get("size"),
-                "connected": bool(rdm.get("connected")),
-                "url": str(rdm.get("url") or "").strip() or build_demo_object_url(
-                    "rdms",
-                    vc_name,
-                    rdm.get("esx_cluster") or cluster_name,
-                    naa,
-                ),
-            }
-    return rows
+def build_lun_audit(snapshot: InventorySnapshot) -> dict[str, dict[str, Any]]:
+    # Per vCenter, with NAAs and datastore names compared case-insensitively:
+    #   unusedRdms              RDMs no VM in the vCenter references
+    #   orphanedRdms            unused RDMs that are also disconnected
+    #   unknownNaaReferences    VM NAA references with no RDM in the vCenter
+    #   duplicateNaaReferences  NAAs a single VM lists more than once
+    #   vmsWithUnknownDatastore VMs whose datastore is not in the vCenter
+    rdms_by_vc: dict[str, dict[str, Mapping]] = {}
+    datastores_by_vc: dict[str, set[str]] = {}
+    vms_by_vc: dict[str, list[Mapping]] = {}
+    for vc_name, _vc_meta, _cluster_name, cluster_data in iter_inventory(snapshot):
+        rdms = rdms_by_vc.setdefault(vc_name, {})
+        for rdm in cluster_data.get("rdms", {}).values():
+            rdms[normalize_lookup_key(rdm.get("naa"))] = rdm
+        datastores_by_vc.setdefault(vc_name, set()).update(
+            normalize_lookup_key(ds.get("name")) for ds in cluster_data.get("datastores", {}).values()
+        )
+        vms_by_vc.setdefault(vc_name, []).extend(cluster_data.get("vms", {}).values())
+
+    audit: dict[str, dict[str, Any]] = {}
+    for vc_name in sorted(rdms_by_vc.keys() | vms_by_vc.keys()):
+        rdms = rdms_by_vc.get(vc_name, {})
+        datastores = datastores_by_vc.get(vc_name, set())
+        referenced: set[str] = set()
+        unknown_refs: list[dict[str, Any]] = []
+        duplicate_refs: list[dict[str, Any]] = []
+        unknown_datastore: list[dict[str, Any]] = []
+        for vm in sorted(vms_by_vc.get(vc_name, []), key=lambda item: str(item.get("name"))):
+            counts: dict[str, int] = {}
+            spelled: dict[str, str] = {}
+            for naa in vm.get("naas_of_rdms") or ():
+                normalized = normalize_lookup_key(naa)
+                if normalized:
+                    counts[normalized] = counts.get(normalized, 0) + 1
+                    spelled.setdefault(normalized, naa)
+            referenced.update(counts)
+            for normalized, count in counts.items():
+                if normalized not in rdms:
+                    unknown_refs.append({"vm": vm.get("name"), "naa": spelled[normalized]})
+                if count > 1:
+                    duplicate_refs.append({"vm": vm.get("name"), "naa": spelled[normalized], "count": count})
+            datastore = normalize_lookup_key(vm.get("datastore"))
+            if datastore and datastore not in datastores:
+                unknown_datastore.append({"vm": vm.get("name"), "datastore": vm.get("datastore")})
+
+        unused = [
+            {"naa": rdm.get("naa"), "esx_cluster": rdm.get("esx_cluster"), "size": rdm.get("size"), "connected": bool(rdm.get("connected"))}
+            for _naa, rdm in sorted((naa, rdms[naa]) for naa in rdms.keys() - referenced)
+        ]
+        audit[vc_name] = {
+            "unusedRdms": unused,
+            "orphanedRdms": [rdm for rdm in unused if not rdm["connected"]],
+            "unknownNaaReferences": sorted(unknown_refs, key=lambda item: (str(item["vm"]), item["naa"])),
+            "duplicateNaaReferences": duplicate_refs,
+            "vmsWithUnknownDatastore": unknown_datastore,
+        }
+    return audit
 
 
-def nested_vms() -> dict[str, dict[str, dict[str, dict[str, Any]]]]:
-    rows: dict[str, dict[str, dict[str, dict[str, Any]]]] = {}
-    for vc_name, _vc_meta, cluster_name, cluster_data in iter_inventory():
-        vc_bucket = rows.setdefault(vc_name, {})
-        cluster_bucket = vc_bucket.setdefault(cluster_name, {})
-        for vm_name, vm in cluster_data.get("vms", {}).items():
-            cluster_bucket[vm_name] = {
-                "naas_of_rdms": vm.get("naas_of_rdms", []),
-                "datastore": vm.get("datastore", ""),
-                "url": str(vm.get("url") or "").strip() or build_demo_object_url(
-                    "vms",
-                    vc_name,
-                    cluster_name,
-                    vm_name,
-                ),
-            }
-    return rows
+def inventory_lun_audit(snapshot: InventorySnapshot | None = None) -> dict[str, dict[str, Any]]:
+    state = snapshot or current_inventory()
+    audit = state.views.get("lun_audit")
+    if audit is None:
+        audit = state.views["lun_audit"] = build_lun_audit(state)
+    return audit
+
 
+def lun_audit_summary(audit: dict[str, dict[str, Any]]) -> dict[str, int]:
+    return {category: sum(len(entry[category]) for entry in audit.values()) for category in LUN_AUDIT_CATEGORIES}
 
-def get_vcenter_names() -> list[str]:
-    return sorted(INVENTORY.keys())
+
+def inventory_list_response(
+    request: Request,
+    view_name: str,
+    limit: int | None,
+    cursor: str | None,
+    sort: str | None,
+) -> Response:
+    fields = parse_fields_param(request, FLAT_VIEW_FIELDS[view_name][1])
+    filter_fields = INVENTORY_LIST_SPECS[view_name]["filter"]
+    filters = [(field, value) for field, value in request.query_params.multi_items() if field in filter_fields]
+    if limit is None and cursor is None and sort is None and not filters:
+        cache_key = f"{view_name}:{','.join(fields)}" if fields else view_name
+        return inventory_json_response(request, cache_key, lambda state: inventory_view(view_name, fields, state))
+
+    # Sort and filter indexes cover the full rows; only the page itself is projected.
+    page = inventory_page(view_name, sort=sort, filters=filters, limit=limit, cursor=cursor)
+    page["items"] = [project_row(row, fields) for row in page["items"]]
+    return JSONResponse(
+        content=page,
+        headers={
+            "X-Total-Count": str(page["total"]),
+            "X-Inventory-Version": str(page["version"]),
+            "Cache-Control": CACHE_CONTROL_POLICIES["inventory"],
+        },
+    )
 
 
-def get_vm_names_by_vc(vc: str | None = None) -> list[str]:
+def get_vcenter_names(snapshot: InventorySnapshot | None = None) -> list[str]:
+    return sorted((snapshot or current_inventory()).tree.keys())
+
+
+def get_vm_names_by_vc(vc: str | None = None, snapshot: InventorySnapshot | None = None) -> list[str]:
     if not vc:
         return []
-    return sorted(
-        {
-            item["name"]
-            for item in flatten_vms()
-            if item.get("vc") == vc and item.get("name")
-        }
-    )
+    return inventory_index_lookup("vm_names_by_vc", vc, snapshot)
 
 
-def get_ds_clusters_for_vc(vc: str | None = None) -> list[str]:
+def get_ds_clusters_for_vc(vc: str | None = None, snapshot: InventorySnapshot | None = None) -> list[str]:
     if not vc:
         return []
-    return sorted(
-        {
-            item["ds_cluster"]
-            for item in flatten_datastores()
-            if item.get("vc") == vc and item.get("ds_cluster")
-        }
-    )
+    return inventory_index_lookup("ds_clusters_by_vc", vc, snapshot)
 
 
-def get_esx_clusters_for_vc(vc: str | None = None) -> list[str]:
+def get_esx_clusters_for_vc(vc: str | None = None, snapshot: InventorySnapshot | None = None) -> list[str]:
     if not vc:
         return []
-    return sorted(
-        {
-            item["esx_cluster"]
-            for item in flatten_esx_hosts()
-            if item.get("vc") == vc and item.get("esx_cluster")
-        }
-    )
+    return inventory_index_lookup("esx_clusters_by_vc", vc, snapshot)
 
 
-def get_datastore_names_by_vc_cluster(vc: str | None = None, ds_cluster: str | None = None) -> list[str]:
+def get_datastore_names_by_vc_cluster(
+    vc: str | None = None,
+    ds_cluster: str | None = None,
+    snapshot: InventorySnapshot | None = None,
+) -> list[str]:
     if not vc or not ds_cluster:
         return []
-    return sorted(
-        {
-            item["name"]
-            for item in flatten_datastores()
-            if item.get("vc") == vc and item.get("ds_cluster") == ds_cluster and item.get("name")
-        }
-    )
+    return list(dict.fromkeys(inventory_index_lookup("datastore_names_by_vc_ds_cluster", (vc, ds_cluster), snapshot)))
 
 
-def get_rdm_naas_by_vc_cluster(vc: str | None = None, esx_cluster: str | None = None) -> list[str]:
+def get_rdm_naas_by_vc_cluster(
+    vc: str | None = None,
+    esx_cluster: str | None = None,
+    snapshot: InventorySnapshot | None = None,
+) -> list[str]:
     if not vc or not esx_cluster:
         return []
-    return sorted(
-        {
-            item["naa"]
-            for item in flatten_rdms()
-            if item.get("vc") == vc and item.get("esx_cluster") == esx_cluster and item.get("naa")
-        }
-    )
+    return inventory_index_lookup("rdm_naas_by_vc_esx_cluster", (vc, esx_cluster), snapshot)
 
 
-def get_esx_names_by_vc_cluster(vc: str | None = None, esx_cluster: str | None = None) -> list[str]:
+def get_esx_names_by_vc_cluster(
+    vc: str | None = None,
+    esx_cluster: str | None = None,
+    snapshot: InventorySnapshot | None = None,
+) -> list[str]:
     if not vc or not esx_cluster:
         return []
-    return sorted(
-        {
-            item["name"]
-            for item in flatten_esx_hosts()
-            if item.get("vc") == vc and item.get("esx_cluster") == esx_cluster and item.get("name")
-        }
-    )
+    return list(dict.fromkeys(inventory_index_lookup("esx_names_by_vc_esx_cluster", (vc, esx_cluster), snapshot)))
 
 
 JOBS_STORE: dict[str, dict[str, Any]] = {}
@@ -1361,7 +3797,7 @@ def find_netapp_machine(machine_name: str | None) -> dict[str, Any] | None:
     return next(
         (
             machine
-            for machine in NETAPP_MACHINES
+            for machine in netapp_machines()
             if machine["name"].lower() == normalized
             or machine["id"].lower() == normalized
             or machine["host"].lower() == normalized
@@ -1462,19 +3898,24 @@ def health() -> dict[str, str]:
     return {"status": "ok", "time": now_iso()}
 
 
+@app.get("/health/startup")
+def health_startup() -> dict[str, Any]:
+    return {**STARTUP_REPORT, "phases": list(STARTUP_REPORT["phases"])}
+
+
 @app.get("/inventory/tree")
-def inventory_tree() -> dict[str, Any]:
-    return INVENTORY
+def inventory_tree(request: Request) -> Response:
+    return inventory_json_response(request, "tree", lambda state: state.tree)
 
 
 @app.post("/login/local")
-def login_local_contract(payload: LocalLoginPayload, response: Response) -> dict[str, str]:
+async def login_local_contract(payload: LocalLoginPayload, response: Response) -> dict[str, str]:
     user = find_user_by_username_or_email(payload.username)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
     provided_password = payload.password or ""
-    if not pwd_context.verify(provided_password, user["password_hash"]):
+    if not await verify_user_password(user, provided_password):
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
     token = issue_access_token(user)
@@ -1486,7 +3927,7 @@ def login_local_contract(payload: LocalLoginPayload, response: Response) -> dict
 def login_auth_upload(payload: AuthUploadPayload, response: Response) -> dict[str, str]:
     user = find_user_by_username_or_email(payload.username)
     if not user:
-        user = next((item for item in USERS_DB if item["email"] == "maya@company.com"), USERS_DB[0])
+        user = USERS_DB.by_email("maya@company.com") or USERS_DB.first()
     token = issue_access_token(user)
     set_auth_cookie(response, token)
     return {"token": token}
@@ -1497,171 +3938,282 @@ def auth_check_contract(request: Request, token: str, teams: list[str] | None =
     user = validate_token(token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
-
-    if is_admin_user(user):
-        team_list = all_known_teams()
-    else:
-        team_list = parse_team_list(request, teams)
-        if not team_list:
-            team_list = effective_user_teams(user)
-
-    return {
-        "teams": team_list,
-        "permissions": effective_user_permissions(user, team_list),
-    }
+    return auth_team_permissions(request, AuthContext(user), teams)
 
 
 @app.post("/auth/login/local")
-def login_local(payload: LocalLoginPayload, response: Response) -> dict[str, Any]:
+async def login_local(payload: LocalLoginPayload, response: Response) -> dict[str, Any]:
     user = find_user_by_username_or_email(payload.username)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
     provided_password = payload.password or ""
-    if not pwd_context.verify(provided_password, user["password_hash"]):
+    if not await verify_user_password(user, provided_password):
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
     token = issue_access_token(user)
     set_auth_cookie(response, token)
 
-    user_public = public_user(user)
-    teams = effective_user_teams(user)
-    return {
-        "user": user_public,
-        "authMode": "local",
-        "teams": teams,
-        "permissions": effective_user_permissions(user, teams),
-    }
+    return auth_session_payload(AuthContext(user), "local")
 
 
 @app.post("/auth/login/adfs")
 def login_adfs(response: Response) -> dict[str, Any]:
-    user = next((item for item in USERS_DB if item["email"] == "maya@company.com"), USERS_DB[0])
+    user = USERS_DB.by_email("maya@company.com") or USERS_DB.first()
     token = issue_access_token(user)
     set_auth_cookie(response, token)
 
-    user_public = public_user(user)
-    teams = effective_user_teams(user)
-    return {
-        "user": user_public,
-        "authMode": "adfs",
-        "teams": teams,
-        "permissions": effective_user_permissions(user, teams),
-    }
+    return auth_session_payload(AuthContext(user), "adfs")
 
 
 @app.get("/auth/session")
-def session(request: Request) -> Any:
-    user = current_user_from_request(request)
-    if not user:
+def session(auth: AuthContext | None = Depends(get_auth_context)) -> Any:
+    if auth is None:
         return None
-
-    user_public = public_user(user)
-    teams = effective_user_teams(user)
-    return {
-        "user": user_public,
-        "authMode": "cookie",
-        "teams": teams,
-        "permissions": effective_user_permissions(user, teams),
-    }
+    return auth_session_payload(auth, "cookie")
 
 
 @app.get("/auth/permissions")
-def auth_permissions(request: Request, teams: list[str] | None = None) -> dict[str, Any]:
-    user = current_user_from_request(request)
-    if not user:
+def auth_permissions(
+    request: Request,
+    teams: list[str] | None = None,
+    auth: AuthContext | None = Depends(get_auth_context),
+) -> dict[str, Any]:
+    if auth is None:
         return {"teams": [], "permissions": []}
-
-    if is_admin_user(user):
-        team_list = all_known_teams()
-    else:
-        team_list = parse_team_list(request, teams)
-        if not team_list:
-            team_list = effective_user_teams(user)
-    return {"teams": team_list, "permissions": effective_user_permissions(user, team_list)}
+    return auth_team_permissions(request, auth, teams)
 
 
 @app.post("/auth/logout")
-def logout(response: Response) -> dict[str, bool]:
+def logout(request: Request, response: Response) -> dict[str, bool]:
+    revoke_token(request_token(request.headers.get("cookie"), request.headers.get("authorization")))
     clear_auth_cookie(response)
     return {"ok": True}
 
 
+@app.get("/inventory/version")
+def inventory_version() -> dict[str, Any]:
+    snapshot = current_inventory()
+    return {
+        "version": snapshot.version,
+        "updatedAt": snapshot.updated_at,
+        "source": snapshot.source,
+        "refresh": dict(INVENTORY_REFRESH_STATUS),
+        "networks": {
+            network: {
+                "version": shard.version if (shard := INVENTORY_SHARDS.get(network)) else None,
+                "updatedAt": shard.updated_at if shard else None,
+                "source": shard.source if shard else None,
+                "refresh": dict(INVENTORY_SHARD_STATUS[network]),
+            }
+            for network in INVENTORY_NETWORK_SPECS
+        },
+    }
+
+
+@app.get("/inventory/search")
+def inventory_search(request: Request, q: str = "", limit: int | None = None) -> dict[str, Any]:
+    result_limit = INVENTORY_SEARCH_DEFAULT_LIMIT if limit is None else limit
+    if result_limit < 1 or result_limit > INVENTORY_SEARCH_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {INVENTORY_SEARCH_MAX_LIMIT}")
+    types = tuple(item.lower() for item in parse_query_list(request, {"type", "types", "types[]"}))
+    unknown = [item for item in types if item not in SEARCH_TYPES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported search type: {unknown[0]}")
+
+    snapshot = current_inventory()
+    index = sync_inventory_search(snapshot)
+    items = index.search(q, result_limit, types or SEARCH_TYPES)
+    return {"query": q, "items": items, "limit": result_limit, "version": snapshot.version}
+
+
+@app.post("/inventory/lookup")
+def inventory_lookup(payload: InventoryLookupPayload) -> Response:
+    requested = {kind: keys for kind in INVENTORY_LOOKUP_VIEWS if (keys := getattr(payload, kind))}
+    key_count = sum(len(keys) for keys in requested.values())
+    if key_count > INVENTORY_LOOKUP_MAX_KEYS:
+        raise HTTPException(status_code=400, detail=f"At most {INVENTORY_LOOKUP_MAX_KEYS} keys per lookup")
+
+    snapshot = current_inventory()
+    return JSONResponse(
+        content=lookup_inventory_objects(requested, snapshot),
+        headers={"X-Inventory-Version": str(snapshot.version), "Cache-Control": CACHE_CONTROL_POLICIES["inventory"]},
+    )
+
+
+@app.get("/inventory/lun-audit")
+def get_inventory_lun_audit(request: Request, vc: str | None = None) -> Response:
+    if vc is not None:
+        snapshot = current_inventory()
+        audit = {vc: entry} if (entry := inventory_lun_audit(snapshot).get(vc)) else {}
+        return JSONResponse(
+            content={"vcenters": audit, "summary": lun_audit_summary(audit), "version": snapshot.version},
+            headers={"X-Inventory-Version": str(snapshot.version), "Cache-Control": CACHE_CONTROL_POLICIES["inventory"]},
+        )
+    return inventory_json_response(
+        request,
+        "lun_audit",
+        lambda state: {
+            "vcenters": inventory_lun_audit(state),
+            "summary": lun_audit_summary(inventory_lun_audit(state)),
+            "version": state.version,
+        },
+    )
+
+
+@app.get("/inventory/rollups")
+def get_inventory_rollups(request: Request, by: str = "vc", vc: str | None = None) -> Response:
+    group = by.strip().lower()
+    if group not in ROLLUP_GROUPS:
+        raise HTTPException(status_code=400, detail=f"Unsupported rollup grouping: {by}")
+    if vc is not None:
+        snapshot = current_inventory()
+        return JSONResponse(
+            content={"by": group, "items": rollup_rows(snapshot, group, vc), "version": snapshot.version},
+            headers={"X-Inventory-Version": str(snapshot.version), "Cache-Control": CACHE_CONTROL_POLICIES["inventory"]},
+        )
+    return inventory_json_response(
+        request,
+        f"rollups:{group}",
+        lambda state: {
+            "by": group,
+            "items": rollup_rows(state, group),
+            "totals": inventory_rollups(state).totals,
+            "version": state.version,
+        },
+    )
+
+
+@app.post("/inventory/refresh")
+def inventory_refresh(
+    source: str | None = None,
+    network: str | None = None,
+    _admin: AuthContext = Depends(require_admin_context),
+) -> dict[str, Any]:
+    if network is not None:
+        if network not in INVENTORY_NETWORK_SPECS:
+            raise HTTPException(status_code=404, detail=f"Unknown network: {network}")
+        accepted = trigger_inventory_shard_refresh(network)
+        shard = INVENTORY_SHARDS.get(network)
+        return {
+            "status": "accepted" if accepted else "running",
+            "network": network,
+            "version": shard.version if shard else None,
+        }
+    if source is not None and source not in INVENTORY_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Unknown inventory source: {source}")
+    accepted = trigger_inventory_refresh(source)
+    return {
+        "status": "accepted" if accepted else "running",
+        "version": current_inventory().version,
+    }
+
+
 @app.get("/vms")
-def get_vms() -> list[dict[str, Any]]:
-    return flatten_vms()
+def get_vms(
+    request: Request,
+    limit: int | None = None,
+    cursor: str | None = None,
+    sort: str | None = None,
+) -> Response:
+    return inventory_list_response(request, "vms", limit, cursor, sort)
 
 
 @app.get("/datastores")
-def get_datastores() -> list[dict[str, Any]]:
-    return flatten_datastores()
+def get_datastores(
+    request: Request,
+    limit: int | None = None,
+    cursor: str | None = None,
+    sort: str | None = None,
+) -> Response:
+    return inventory_list_response(request, "datastores", limit, cursor, sort)
 
 
 @app.get("/esx-hosts")
-def get_esx_hosts() -> list[dict[str, Any]]:
-    return flatten_esx_hosts()
+def get_esx_hosts(
+    request: Request,
+    limit: int | None = None,
+    cursor: str | None = None,
+    sort: str | None = None,
+) -> Response:
+    return inventory_list_response(request, "esx", limit, cursor, sort)
 
 
 @app.get("/rdms")
-def get_rdms() -> list[dict[str, Any]]:
-    return flatten_rdms()
+def get_rdms(
+    request: Request,
+    limit: int | None = None,
+    cursor: str | None = None,
+    sort: str | None = None,
+) -> Response:
+    return inventory_list_response(request, "rdms", limit, cursor, sort)
 
 
 @app.get("/download/vms")
-def download_vms() -> dict[str, Any]:
-    return nested_vms()
+def download_vms(request: Request, export_format: str | None = Query(default=None, alias="format")) -> Response:
+    return download_response(request, "vms", export_format)
 
 
 @app.get("/download/ds")
 @app.get("/download/datastores")
-def download_datastores() -> dict[str, Any]:
-    return nested_datastores()
+def download_datastores(request: Request, export_format: str | None = Query(default=None, alias="format")) -> Response:
+    return download_response(request, "datastores", export_format)
 
 
 @app.get("/download/esx")
-def download_esx() -> dict[str, Any]:
-    return nested_esx_hosts()
+def download_esx(request: Request, export_format: str | None = Query(default=None, alias="format")) -> Response:
+    return download_response(request, "esx", export_format)
 
 
 @app.get("/download/rdm")
 @app.get("/download/rdms")
-def download_rdms() -> dict[str, Any]:
-    return nested_rdms()
+def download_rdms(request: Request, export_format: str | None = Query(default=None, alias="format")) -> Response:
+    return download_response(request, "rdms", export_format)
 
 
 @app.get("/vcenters")
-def get_vcenters() -> list[str]:
-    return get_vcenter_names()
+def get_vcenters(request: Request) -> Response:
+    return inventory_json_response(request, "vcenters", get_vcenter_names)
 
 
 @app.get("/vc_collector/get_vcs")
-def get_vcs_contract() -> list[str]:
-    return get_vcenter_names()
+def get_vcs_contract(request: Request) -> Response:
+    return inventory_json_response(request, "vcenters", get_vcenter_names)
+
+
+NETAPP_MACHINE_FIELDS = ("id", "name", "host", "cluster", "location", "version")
 
 
 @app.get("/netapp/machines")
-def get_netapp_machines() -> list[dict[str, str]]:
-    return NETAPP_MACHINES
+def get_netapp_machines(request: Request) -> Response:
+    fields = parse_fields_param(request, NETAPP_MACHINE_FIELDS)
+    if not fields:
+        return data_json_response(request, "netapps", "machines", netapp_machines)
+    return data_json_response(
+        request,
+        "netapps",
+        f"machines:{','.join(fields)}",
+        lambda: [{field: machine.get(field) for field in fields} for machine in netapp_machines()],
+    )
 
 
 @app.get("/netapps")
-def get_netapps_contract() -> list[str]:
-    return [machine["name"] for machine in NETAPP_MACHINES]
+def get_netapps_contract(request: Request) -> Response:
+    return data_json_response(request, "netapps", "names", lambda: [machine["name"] for machine in netapp_machines()])
 
 
 @app.get("/exch/volumes")
-def get_exch_volumes() -> list[dict[str, Any]]:
-    return EXCH_VOLUMES
+def get_exch_volumes(request: Request) -> Response:
+    return data_json_response(request, "exch_volumes", "volumes", lambda: EXCH_VOLUMES)
 
 
 @app.get("/qtrees")
-def get_qtrees() -> list[dict[str, Any]]:
-    return QTREES
+def get_qtrees(request: Request) -> Response:
+    return data_json_response(request, "qtrees", "qtrees", lambda: QTREES)
 
 
 @app.get("/admin/permissions")
-def admin_permissions_catalog(request: Request) -> dict[str, Any]:
-    require_admin_user(request)
+def admin_permissions_catalog(_admin: AuthContext = Depends(require_admin_context)) -> dict[str, Any]:
     return {
         "permissionKeys": all_known_permission_keys(),
         "permissions": all_known_permissions(),
@@ -1670,8 +4222,7 @@ def admin_permissions_catalog(request: Request) -> dict[str, Any]:
 
 
 @app.get("/admin/groups")
-def admin_groups(request: Request) -> dict[str, Any]:
-    require_admin_user(request)
+def admin_groups(_admin: AuthContext = Depends(require_admin_context)) -> dict[str, Any]:
     groups = [
         serialize_admin_group(group_name)
         for group_name in sorted(TEAM_PERMISSIONS.keys(), key=lambda name: name.lower())
@@ -1680,8 +4231,10 @@ def admin_groups(request: Request) -> dict[str, Any]:
 
 
 @app.post("/admin/groups")
-def admin_create_group(payload: AdminGroupCreatePayload, request: Request) -> dict[str, Any]:
-    require_admin_user(request)
+def admin_create_group(
+    payload: AdminGroupCreatePayload,
+    _admin: AuthContext = Depends(require_admin_context),
+) -> dict[str, Any]:
     group_name = str(payload.name or "").strip()
     if not group_name:
         raise HTTPException(status_code=400, detail="Group name is required")
@@ -1690,15 +4243,21 @@ def admin_create_group(payload: AdminGroupCreatePayload, request: Request) -> di
         raise HTTPException(status_code=409, detail="Group already exists")
 
     ensure_group_permission_flag(group_name)
+    compile_permission_model()
     permission_keys = normalize_permission_key_list(payload.permissionKeys)
     GROUP_PERMISSION_KEYS[group_name] = permission_keys
     TEAM_PERMISSIONS[group_name] = permissions_for_permission_keys(permission_keys)
+    compile_permission_model()
+    bump_data_version("users")
     return serialize_admin_group(group_name)
 
 
 @app.put("/admin/groups/{group_name}")
-def admin_update_group(group_name: str, payload: AdminGroupUpdatePayload, request: Request) -> dict[str, Any]:
-    require_admin_user(request)
+def admin_update_group(
+    group_name: str,
+    payload: AdminGroupUpdatePayload,
+    _admin: AuthContext = Depends(require_admin_context),
+) -> dict[str, Any]:
     resolved = resolve_group_name(group_name)
     if not resolved:
         raise HTTPException(status_code=404, detail="Group not found")
@@ -1706,12 +4265,13 @@ def admin_update_group(group_name: str, payload: AdminGroupUpdatePayload, reques
     permission_keys = normalize_permission_key_list(payload.permissionKeys)
     GROUP_PERMISSION_KEYS[resolved] = permission_keys
     TEAM_PERMISSIONS[resolved] = permissions_for_permission_keys(permission_keys)
+    compile_permission_model()
+    bump_data_version("users")
     return serialize_admin_group(resolved)
 
 
 @app.delete("/admin/groups/{group_name}")
-def admin_delete_group(group_name: str, request: Request) -> dict[str, bool]:
-    require_admin_user(request)
+def admin_delete_group(group_name: str, _admin: AuthContext = Depends(require_admin_context)) -> dict[str, bool]:
     resolved = resolve_group_name(group_name)
     if not resolved:
         raise HTTPException(status_code=404, detail="Group not found")
@@ -1719,22 +4279,24 @@ def admin_delete_group(group_name: str, request: Request) -> dict[str, bool]:
     TEAM_PERMISSIONS.pop(resolved, None)
     TEAM_PERMISSION_FLAGS.pop(resolved, None)
     GROUP_PERMISSION_KEYS.pop(resolved, None)
+    compile_permission_model()
     for user in USERS_DB:
         user["teams"] = [team for team in user.get("teams", []) if team != resolved]
+    bump_data_version("users")
     return {"ok": True}
 
 
 @app.get("/admin/users")
-def admin_users(request: Request) -> dict[str, Any]:
-    require_admin_user(request)
+def admin_users(_admin: AuthContext = Depends(require_admin_context)) -> dict[str, Any]:
     users = [serialize_admin_user(user) for user in sorted(USERS_DB, key=lambda item: item["username"].lower())]
     return {"users": users}
 
 
 @app.post("/admin/users")
-def admin_create_user(payload: AdminUserCreatePayload, request: Request) -> dict[str, Any]:
-    require_admin_user(request)
-
+async def admin_create_user(
+    payload: AdminUserCreatePayload,
+    _admin: AuthContext = Depends(require_admin_context),
+) -> dict[str, Any]:
     username = str(payload.username or "").strip()
     if not username:
         raise HTTPException(status_code=400, detail="Username is required")
@@ -1747,6 +4309,10 @@ def admin_create_user(payload: AdminUserCreatePayload, request: Request) -> dict
         raise HTTPException(status_code=400, detail="Password is required")
 
     teams = normalize_team_list(payload.teams)
+    password_hash = await hash_password(password)
+    # Another request may have taken the username while the hash was computed.
+    if find_user_by_username_or_email(username):
+        raise HTTPException(status_code=409, detail="Username already exists")
 
     new_user = {
         "id": f"u-{uuid4().hex[:10]}",
@@ -1756,51 +4322,68 @@ def admin_create_user(payload: AdminUserCreatePayload, request: Request) -> dict
         "role": "operator",
         "teams": teams,
         "avatar": None,
-        "password_hash": pwd_context.hash(password),
+        "password_hash": password_hash,
     }
-    USERS_DB.append(new_user)
+    USERS_DB.add(new_user)
+    bump_data_version("users")
     return serialize_admin_user(new_user)
 
 
 @app.put("/admin/users/{user_ref}")
-def admin_update_user(user_ref: str, payload: AdminUserUpdatePayload, request: Request) -> dict[str, Any]:
-    require_admin_user(request)
-
+async def admin_update_user(
+    user_ref: str,
+    payload: AdminUserUpdatePayload,
+    _admin: AuthContext = Depends(require_admin_context),
+) -> dict[str, Any]:
     user = find_user_by_id_or_username(user_ref)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    # Existing sessions are only cut off when the credentials or team grants actually change.
+    changed = False
     if payload.teams is not None:
-        user["teams"] = normalize_team_list(payload.teams)
+        teams = normalize_team_list(payload.teams)
+        changed = set(teams) != set(user.get("teams", []))
+        user["teams"] = teams
 
     if payload.password is not None:
         password = str(payload.password or "")
         if not password:
             raise HTTPException(status_code=400, detail="Password cannot be empty")
-        user["password_hash"] = pwd_context.hash(password)
-
+        user["password_hash"] = await hash_password(password)
+        changed = True
+
+    if changed:
+        # Appending to the shared revocation log can wait on another worker's compaction.
+        await asyncio.to_thread(TOKEN_REVOCATIONS.revoke_user, user["id"])
+        invalidate_token_cache(user["id"])
+    bump_data_version("users")
     return serialize_admin_user(user)
 
 
 @app.delete("/admin/users/{user_ref}")
-def admin_delete_user(user_ref: str, request: Request) -> dict[str, bool]:
-    require_admin_user(request)
+def admin_delete_user(user_ref: str, _admin: AuthContext = Depends(require_admin_context)) -> dict[str, bool]:
     user = find_user_by_id_or_username(user_ref)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     USERS_DB.remove(user)
+    TOKEN_REVOCATIONS.revoke_user(user["id"])
+    invalidate_token_cache(user["id"])
+    bump_data_version("users")
     return {"ok": True}
 
 
 @app.get("/users")
-def get_users() -> list[dict[str, Any]]:
-    return [public_user(u) for u in USERS_DB]
+def get_users(request: Request) -> Response:
+    fields = parse_fields_param(request, PUBLIC_USER_FIELDS)
+    cache_key = f"public:{','.join(fields)}" if fields else "public"
+    return data_json_response(request, "users", cache_key, lambda: [public_user(u, fields) for u in USERS_DB])
 
 
 @app.get("/vms/names")
-def vm_names() -> list[str]:
-    return [item["name"] for item in flatten_vms()]
+def vm_names(request: Request) -> Response:
+    return inventory_json_response(request, "vm_names", lambda state: [item["name"] for item in inventory_view("vms", snapshot=state)])
 
 
 @app.get("/vms/by-vc")
@@ -1809,8 +4392,12 @@ def vm_names_by_vc(vc: str | None = None) -> list[str]:
 
 
 @app.get("/datastores/names")
-def datastore_names() -> list[str]:
-    return [item["name"] for item in flatten_datastores()]
+def datastore_names(request: Request) -> Response:
+    return inventory_json_response(
+        request,
+        "datastore_names",
+        lambda state: [item["name"] for item in inventory_view("datastores", snapshot=state)],
+    )
 
 
 @app.get("/datastores/by-vc-cluster")
@@ -1819,8 +4406,8 @@ def datastores_by_vc_cluster(vc: str | None = None, ds_cluster: str | None = Non
 
 
 @app.get("/rdm/names")
-def rdm_names() -> list[str]:
-    return [item["naa"] for item in flatten_rdms()]
+def rdm_names(request: Request) -> Response:
+    return inventory_json_response(request, "rdm_names", lambda state: [item["naa"] for item in inventory_view("rdms", snapshot=state)])
 
 
 @app.get("/rdms/by-vc-cluster")
@@ -1829,8 +4416,8 @@ def rdms_by_vc_cluster(vc: str | None = None, esx_cluster: str | None = None) ->
 
 
 @app.get("/esx/names")
-def esx_names() -> list[str]:
-    return [item["name"] for item in flatten_esx_hosts()]
+def esx_names(request: Request) -> Response:
+    return inventory_json_response(request, "esx_names", lambda state: [item["name"] for item in inventory_view("esx", snapshot=state)])
 
 
 @app.get("/esx/by-vc-cluster")
@@ -1839,8 +4426,8 @@ def esx_by_vc_cluster(vc: str | None = None, esx_cluster: str | None = None) ->
 
 
 @app.get("/volumes")
-def volumes() -> list[str]:
-    return [item["name"] for item in EXCH_VOLUMES]
+def volumes(request: Request) -> Response:
+    return data_json_response(request, "exch_volumes", "names", lambda: [item["name"] for item in EXCH_VOLUMES])
 
 
 def normalize_site(site: str | None) -> str:
@@ -1892,17 +4479,22 @@ def lun_delete(site: str, payload: dict[str, Any]) -> dict[str, Any]:
     }
 
 
+IGROUPS_BY_SITE = {
+    "five": ["FIVE_IGRP_DB01", "FIVE_IGRP_DB02", "FIVE_IGRP_EXCH01"],
+    "nova": ["NOVA_IGRP_DB01", "NOVA_IGRP_DB02", "NOVA_IGRP_EXCH01"],
+}
+AGGREGATES = ["AGG-01", "AGG-02", "AGG-03", "AGG-04", "AGG-05"]
+
+
 @app.get("/igroups")
-def get_igroups(site: str) -> list[str]:
+def get_igroups(request: Request, site: str) -> Response:
     site_name = normalize_site(site)
-    if site_name == "nova":
-        return ["NOVA_IGRP_DB01", "NOVA_IGRP_DB02", "NOVA_IGRP_EXCH01"]
-    return ["FIVE_IGRP_DB01", "FIVE_IGRP_DB02", "FIVE_IGRP_EXCH01"]
+    return data_json_response(request, "catalogs", f"igroups:{site_name}", lambda: IGROUPS_BY_SITE[site_name])
 
 
 @app.get("/aggregates")
-def aggregates() -> list[str]:
-    return ["AGG-01", "AGG-02", "AGG-03", "AGG-04", "AGG-05"]
+def aggregates(request: Request) -> Response:
+    return data_json_response(request, "catalogs", "aggregates", lambda: AGGREGATES)
 
 
 @app.get("/ds-clusters/by-vc")
@@ -1919,71 +4511,37 @@ def esx_clusters_by_vc(vc: str | None = None) -> list[str]:
 def clusters_by_vc(vc: str | None = None) -> list[str]:
     if not vc:
         return []
-    return sorted((INVENTORY.get(vc) or {}).keys())
+    return sorted((current_inventory().tree.get(vc) or {}).keys())
 
 
 @app.get("/network/{network}/vcenter/{vcenter}/clusters")
 def network_clusters(network: str, vcenter: str) -> list[str]:
-    _ = network
-    return sorted((INVENTORY.get(vcenter) or {}).keys())
+    return sorted((inventory_shard(network).tree.get(vcenter) or {}).keys())
 
 
 @app.get("/network/{network}/vcenter/{vcenter}/ds_clusters")
 def network_ds_clusters(network: str, vcenter: str) -> list[str]:
-    _ = network
-    return get_ds_clusters_for_vc(vcenter)
+    return get_ds_clusters_for_vc(vcenter, inventory_shard(network))
 
 
 @app.get("/network/{network}/vcenter/{vcenter}/datatores")
 def network_datatores(network: str, vcenter: str) -> list[str]:
-    _ = network
-    return sorted(
-        [
-            item["name"]
-            for item in flatten_datastores()
-            if str(item.get("vc") or "") == vcenter and item.get("name")
-        ]
-    )
+    return inventory_index_lookup("datastore_names_by_vc", vcenter, inventory_shard(network))
 
 
 @app.get("/network/{network}/vcenter/{vcenter}/cluster/{cluster}/datastores")
 def network_cluster_datastores(network: str, vcenter: str, cluster: str) -> list[str]:
-    _ = network
-    return sorted(
-        [
-            item["name"]
-            for item in flatten_datastores()
-            if str(item.get("vc") or "") == vcenter
-            and str(item.get("ds_cluster") or "") == cluster
-            and item.get("name")
-        ]
-    )
+    return inventory_index_lookup("datastore_names_by_vc_ds_cluster", (vcenter, cluster), inventory_shard(network))
 
 
 @app.get("/network/{network}/vcenter/{vcenter}/hosts")
 def network_hosts(network: str, vcenter: str) -> list[str]:
-    _ = network
-    return sorted(
-        [
-            item["name"]
-            for item in flatten_esx_hosts()
-            if str(item.get("vc") or "") == vcenter and item.get("name")
-        ]
-    )
+    return inventory_index_lookup("esx_names_by_vc", vcenter, inventory_shard(network))
 
 
 @app.get("/network/{network}/vcenter/{vcenter}/cluster/{cluster}/hosts")
 def network_cluster_hosts(network: str, vcenter: str, cluster: str) -> list[str]:
-    _ = network
-    return sorted(
-        [
-            item["name"]
-            for item in flatten_esx_hosts()
-            if str(item.get("vc") or "") == vcenter
-            and str(item.get("esx_cluster") or "") == cluster
-            and item.get("name")
-        ]
-    )
+    return inventory_index_lookup("esx_names_by_vc_esx_cluster", (vcenter, cluster), inventory_shard(network))
 
 
 @app.get("/esx/by-cluster")
@@ -2216,38 +4774,107 @@ def build_vm_information_response(query: str) -> dict[str, Any]:
 
 def build_naa_information_response(query: str) -> dict[str, Any]:
     naa = str(query or "").strip() or "unknown"
+    entry = inventory_reverse_lookup("rdm_by_naa", normalize_lookup_key(naa))
+    if entry is None:
+        return {"input": naa, "found": False}
+
+    rdm = entry["item"]
+    row = flat_row("rdms", rdm, entry["cluster"])
     return {
         "input": naa,
-        "type": "VMFS",
-        "datastore": "DS-TLV-FAST-01",
-        "capacity_gb": 500,
-        "status": "Active",
-        "array": "AFF-A400",
-        "owner_esx": "ESX-TLV-01",
-        "naa_url": f"storage.lab.local/naa/{naa}",
+        "found": True,
+        "type": "RDM",
+        "naa": rdm["naa"],
+        "vc": rdm["vc"],
+        "esx_cluster": rdm["esx_cluster"],
+        "capacity_gb": rdm["size"],
+        "status": "Active" if rdm["connected"] else "Disconnected",
+        "vms": inventory_index_lookup("vms_by_naa", normalize_lookup_key(naa)),
+        "naa_url": row["url"],
     }
 
 
+def build_naa_mapping_response(query: str) -> str:
+    entry = inventory_reverse_lookup("rdm_by_naa", normalize_lookup_key(query))
+    if entry is None:
+        return f"NAA: {query}\nNo RDM found"
+    rdm = entry["item"]
+    vms = inventory_index_lookup("vms_by_naa", normalize_lookup_key(query))
+    return (
+        f"NAA: {rdm['naa']}\nvCenter: {rdm['vc']}\nCluster: {rdm['esx_cluster']}\n"
+        f"Size: {rdm['size']} GB\nConnected: {'yes' if rdm['connected'] else 'no'}\n"
+        f"VMs: {', '.join(vms) if vms else '-'}"
+    )
+
+
+def build_vc_data_from_naa_response(query: str) -> str:
+    snapshot = current_inventory()
+    entry = inventory_reverse_lookup("rdm_by_naa", normalize_lookup_key(query), snapshot)
+    if entry is None:
+        return f"NAA: {query}\nNo vCenter found"
+    vc_name = entry["item"]["vc"]
+    vc_meta = snapshot.vc_meta.get(vc_name, {})
+    return (
+        f"NAA: {entry['item']['naa']}\nvCenter: {vc_name}\nVersion: {vc_meta.get('version', '-')}\n"
+        f"Location: {vc_meta.get('location', '-')}\n"
+        f"Host Count: {len(set(inventory_index_lookup('esx_names_by_vc', vc_name, snapshot)))}\n"
+        f"VM Count: {len(inventory_index_lookup('vm_names_by_vc', vc_name, snapshot))}\n"
+        f"Status: {str(vc_meta.get('status', 'unknown')).capitalize()}"
+    )
+
+
+def build_pwwn_to_esx_response(query: str) -> str:
+    # The dashboard sends the host name for ESX rows without PWWNs, so a name returns that host's HBAs.
+    entry = inventory_reverse_lookup("esx_by_pwwn", normalize_pwwn(query))
+    header = f"PWWN: {query}\n"
+    if entry is None:
+        entry = inventory_reverse_lookup("esx_by_name", normalize_lookup_key(query))
+        header = ""
+    if entry is None:
+        return f"PWWN: {query}\nNo ESX host found"
+    esx = entry["item"]
+    pwwn_lines = "\n".join(f"PWWN-{index}: {pwwn}" for index, pwwn in enumerate(esx.get("pwwns") or (), start=1))
+    return (
+        f"{header}ESX: {esx['name']}\nvCenter: {esx['vc']}\nCluster: {esx['esx_cluster']}\n"
+        f"{pwwn_lines or 'PWWNs: none'}"
+    )
+
+
+def build_ds_vms_response(query: str) -> str:
+    vms = inventory_index_lookup("vms_by_datastore", normalize_lookup_key(query))
+    if not vms:
+        return f"Datastore: {query}\n\nVMs: none"
+    vm_lines = "\n".join(f"{index}. {name}" for index, name in enumerate(vms, start=1))
+    return f"Datastore: {query}\n\nVMs:\n{vm_lines}"
+
+
+def build_unused_luns_response(query: str) -> str:
+    audit = inventory_lun_audit().get(str(query or "").strip())
+    if not audit or not audit["unusedRdms"]:
+        return f"vCenter: {query}\nUnused LUNs: none"
+    naa_lines = "\n".join(
+        f"{index}. {rdm['naa']}{'' if rdm['connected'] else ' (disconnected)'}"
+        for index, rdm in enumerate(audit["unusedRdms"], start=1)
+    )
+    return f"vCenter: {query}\nUnused LUNs:\n{naa_lines}"
+
+
 HERZI_RESPONSES = {
     "/herzi/vc-info": lambda q: f"vCenter: {q}\nVersion: 7.0.3\nHost Count: 12\nVM Count: 156\nStatus: Healthy",
     "/herzi/vc-health": lambda q: f"Input: {q}\nStatus: Healthy\nCPU Usage: 45%\nMemory: 62%\nStorage: 71%\nAlarms: 0",
     "/herzi/vm-lookup": lambda q: f"VM: {q}\nvCenter: VC-TLV-01\nHost: ESX-TLV-01\nIP: 10.10.0.11\nStatus: Running",
     "/herzi/vm-snapshot": lambda q: f"VM: {q}\nSnapshots: 3\nOldest: 2025-01-15\nTotal Size: 12.5 GB",
     "/herzi/ds-usage": lambda q: f"Datastore: {q}\nCapacity: 10 TB\nUsed: 6.2 TB\nFree: 38%\nVMs: 18",
-    "/herzi/ds-vms": lambda q: f"Datastore: {q}\n\nVMs:\n1. web-prod-001\n2. db-prod-005\n3. app-stg-012",
+    "/herzi/ds-vms": build_ds_vms_response,
     "/herzi/naa-lookup": build_naa_information_response,
-    "/herzi/naa-mapping": lambda q: f"NAA: {q}\nMapped to: DS-NYC-CAP-01\nHost: ESX-NYC-01\nLUN ID: 12",
+    "/herzi/naa-mapping": build_naa_mapping_response,
     "/herzi/vm-naa": lambda q: f"VM: {q}\n\nNAA Devices:\n1. naa.6000A0A1B2C30001 (100 GB)\n2. naa.6000A0A1B2C30002 (200 GB)",
     "/herzi/naa-ds-information": lambda q: (
         f"Input: {q}\nType: Datastore/NAA\nMapped DS: DS-TLV-FAST-01\nMapped NAA: naa.6000A0A1B2C30001\nSize: 500 GB\nStatus: Active"
     ),
-    "/herzi/esx-pwwn": lambda q: (
-        f"ESX: {q}\nPWWN-1: 10:00:00:90:fa:90:11:01\nPWWN-2: 10:00:00:90:fa:90:11:02\nPWWN-3: 10:00:00:90:fa:90:11:03"
-    ),
+    "/herzi/esx-pwwn": build_pwwn_to_esx_response,
     "/herzi/vm-information": build_vm_information_response,
-    "/herzi/unused-luns": lambda q: (
-        f"vCenter: {q}\nUnused LUNs:\n1. lun_orphan_001\n2. lun_orphan_014\n3. lun_orphan_022"
-    ),
+    "/herzi/unused-luns": build_unused_luns_response,
     "/herzi/lun-volume-information": lambda q: (
         f"Object: {q}\nType: LUN/Volume\nArray: AFF-A400\nSVM: svm_prod_01\nSize: 1.2 TB\nUsed: 62%\nStatus: online"
     ),
@@ -2257,7 +4884,7 @@ HERZI_RESPONSES = {
 
 HERZI_CONTRACT_HANDLERS = {
     "/unused_luns": HERZI_RESPONSES["/herzi/unused-luns"],
-    "/vc_data_from_naa": HERZI_RESPONSES["/herzi/vc-info"],
+    "/vc_data_from_naa": build_vc_data_from_naa_response,
     "/get_vm_or_ds_information": HERZI_RESPONSES["/herzi/vm-information"],
     "/naa_to_tdev": HERZI_RESPONSES["/herzi/naa-mapping"],
     "/convert_pwwn": HERZI_RESPONSES["/herzi/change-pwwn"],
@@ -2318,8 +4945,9 @@ async def troubleshooter_vc(payload: TroubleshooterVCRequest) -> dict[str, Any]:
 
     await apply_troubleshooter_delay()
 
-    vc_meta = VC_META.get(vc_name, {})
-    clusters = sorted((INVENTORY.get(vc_name) or {}).keys())
+    snapshot = current_inventory()
+    vc_meta = snapshot.vc_meta.get(vc_name, {})
+    clusters = sorted((snapshot.tree.get(vc_name) or {}).keys())
     return {
         "mode": "vc",
         "vc_name": vc_name,
@@ -2359,14 +4987,10 @@ async def troubleshooter_naas(payload: TroubleshooterNaasRequest) -> dict[str, A
 
     await apply_troubleshooter_delay()
 
-    rdms_by_naa = {
-        str(item.get("naa") or ""): item
-        for item in flatten_rdms()
-        if str(item.get("naa") or "").strip()
-    }
     results = []
     for naa in cleaned_naas:
-        details = rdms_by_naa.get(naa)
+        entry = inventory_reverse_lookup("rdm_by_naa", normalize_lookup_key(naa))
+        details = flat_row("rdms", entry["item"], entry["cluster"]) if entry else None
         results.append(
             {
                 "naa": naa,
@@ -2844,3 +5468,5 @@ def generic_actions_patch(path: str, payload: dict[str, Any]) -> dict[str, Any]:
 def generic_actions_delete(path: str, payload: dict[str, Any] | None = None) -> dict[str, Any]:
     return _create_job(f"/{path}", payload or {})
 
+
+STARTUP_REPORT["importMs"] = round((time.perf_counter() - _STARTUP_STARTED) * 1000, 2)
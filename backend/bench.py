@@ -0,0 +1,150 @@
+# In-process API benchmarks; no server needed. Needs requirements-dev.txt (httpx).
+#   python bench.py login [--requests N] [--concurrency C]
+#   python bench.py asgi [--requests N] [--paths /health /vcenters]
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+# Throttling would turn the login burst into 429s; measure the app without it.
+os.environ.setdefault("RATE_LIMITS", "")
+
+import app
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def bench_verify(rounds: int) -> float:
+    password_hash = app.pwd_context.hash("bench-password")
+    started = time.perf_counter()
+    for _ in range(rounds):
+        app.pwd_context.verify("bench-password", password_hash)
+    return rounds / (time.perf_counter() - started)
+
+
+async def bench_login(requests: int, concurrency: int) -> dict[str, float]:
+    transport = httpx.ASGITransport(app=app.app)
+    statuses: dict[int, int] = {}
+    login_latencies: list[float] = []
+    health_latencies: list[float] = []
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for index in range(requests):
+        queue.put_nowait(index)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login_worker() -> None:
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                response = await client.post("/auth/login/local", json={"username": "sarah", "password": "sarah123"})
+                login_latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def health_probe(done: asyncio.Event) -> None:
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/health")
+                health_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.005)
+
+        done = asyncio.Event()
+        probe = asyncio.create_task(health_probe(done))
+        started = time.perf_counter()
+        await asyncio.gather(*(login_worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe
+
+    ok = statuses.get(200, 0)
+    return {
+        "elapsed_s": elapsed,
+        "ok": ok,
+        "rejected": statuses.get(503, 0),
+        "logins_per_s": ok / elapsed,
+        "login_p50_ms": statistics.median(login_latencies) * 1000,
+        "login_p99_ms": percentile(login_latencies, 0.99) * 1000,
+        "health_p50_ms": statistics.median(health_latencies) * 1000 if health_latencies else 0.0,
+        "health_p99_ms": percentile(health_latencies, 0.99) * 1000,
+    }
+
+
+async def bench_asgi(path: str, requests: int, token: str) -> float:
+    # Drives the ASGI app directly so the number reflects middleware and routing cost, not an HTTP client.
+    raw_path, _, query = path.partition("?")
+    headers = [(b"host", b"bench"), (b"cookie", f"{app.ACCESS_COOKIE_NAME}={token}".encode("latin-1"))]
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"{path} returned {message['status']}")
+
+    async def call() -> None:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": raw_path,
+            "raw_path": raw_path.encode("latin-1"),
+            "root_path": "",
+            "query_string": query.encode("latin-1"),
+            "headers": headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+        }
+        await app.app(scope, receive, send)
+
+    for _ in range(min(200, requests)):
+        await call()
+    started = time.perf_counter()
+    for _ in range(requests):
+        await call()
+    return requests / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+    login = commands.add_parser("login", help="pbkdf2 login throughput through the password pool")
+    login.add_argument("--requests", type=int, default=200)
+    login.add_argument("--concurrency", type=int, default=32)
+    asgi = commands.add_parser("asgi", help="requests/s through the full middleware stack, in process")
+    asgi.add_argument("--requests", type=int, default=5000)
+    asgi.add_argument("--paths", nargs="+", default=["/health", "/vcenters"])
+    args = parser.parse_args()
+
+    if args.command == "login":
+        cores = min(app.PASSWORD_HASH_WORKERS, os.cpu_count() or 1)
+        verify_rate = bench_verify(20)
+        result = asyncio.run(bench_login(args.requests, args.concurrency))
+        app.shutdown_password_pool()
+        print(f"pool workers={app.PASSWORD_HASH_WORKERS} max_pending={app.PASSWORD_HASH_MAX_PENDING} cores={cores}")
+        print(f"raw verify: {verify_rate:.1f}/s on one core")
+        print(
+            f"logins: {result['ok']} ok, {result['rejected']} rejected in {result['elapsed_s']:.2f}s"
+            f" = {result['logins_per_s']:.1f}/s, {result['logins_per_s'] / cores:.1f}/s per core"
+        )
+        print(f"login latency p50={result['login_p50_ms']:.1f}ms p99={result['login_p99_ms']:.1f}ms")
+        print(f"/health during burst p50={result['health_p50_ms']:.1f}ms p99={result['health_p99_ms']:.1f}ms")
+    elif args.command == "asgi":
+        token = app.issue_access_token(app.find_user_by_username_or_email("sarah"))
+        for path in args.paths:
+            rate = asyncio.run(bench_asgi(path, args.requests, token))
+            print(f"{path}: {rate:.0f} req/s ({1e6 / rate:.0f} us/req)")
+
+
+if __name__ == "__main__":
+    main()
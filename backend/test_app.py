@@ -0,0 +1,193 @@
+# Backend tests; run from backend/ with `python -m pytest -q` (needs requirements-dev.txt).
+# Settings are read at import, so each test loads its own copy of app.py with the environment it needs.
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+APP_PATH = Path(__file__).with_name("app.py")
+
+
+@pytest.fixture
+def load_app(monkeypatch):
+    def load(**env: str):
+        monkeypatch.setenv("RATE_LIMITS", "")
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        spec = importlib.util.spec_from_file_location(f"app_{uuid4().hex}", APP_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    return load
+
+
+def login(client: TestClient, username: str = "admin", password: str = "admin123") -> None:
+    response = client.post("/auth/login/local", json={"username": username, "password": password})
+    assert response.status_code == 200, response.text
+
+
+def write_json_inventory(path: Path) -> str:
+    path.write_text(
+        json.dumps(
+            {
+                "vcenters": {"VC-REAL-01": {"status": "active", "location": "DC1"}},
+                "vms": [{"vc": "VC-REAL-01", "name": "vm-real-1", "cluster": "C1"}],
+                "datastores": [{"vc": "VC-REAL-01", "name": "DS-REAL-1", "ds_cluster": "DSC1", "cluster": "C1"}],
+                "esx": [],
+                "rdms": [],
+            }
+        ),
+        encoding="utf-8",
+    )
+    return os.fspath(path)
+
+
+@pytest.mark.parametrize("lazy", ["true", "false"])
+def test_file_source_never_publishes_the_demo_seed(load_app, tmp_path, lazy):
+    app = load_app(
+        LAZY_STARTUP=lazy,
+        INVENTORY_SOURCE="json",
+        INVENTORY_SNAPSHOT_PATH=write_json_inventory(tmp_path / "inventory.json"),
+    )
+    client = TestClient(app.app)
+    login(client)
+
+    # No lifespan here, so this is a request arriving during warm-up.
+    assert client.get("/vcenters").json() == ["VC-REAL-01"]
+    snapshot = app.current_inventory()
+    assert (snapshot.source, snapshot.version) == ("json", 1)
+
+
+def test_deferred_password_hashes_do_not_serialize_across_users(load_app, monkeypatch):
+    app = load_app(LAZY_STARTUP="true")
+    real_hash = app.pwd_context.hash
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash(password: str) -> str:
+        if password == "admin123":
+            started.set()
+            release.wait(10)
+        return real_hash(password)
+
+    monkeypatch.setattr(app.pwd_context, "hash", slow_hash)
+    admin = app.find_user_by_username_or_email("admin")
+    sarah = app.find_user_by_username_or_email("sarah")
+    results: dict[str, bool] = {}
+
+    def check(name: str, user: dict, password: str) -> None:
+        results[name] = app.check_user_password(user, password)
+
+    admin_first = threading.Thread(target=check, args=("admin-first", admin, "admin123"))
+    admin_first.start()
+    assert started.wait(5)
+    admin_second = threading.Thread(target=check, args=("admin-second", admin, "admin123"))
+    admin_second.start()
+
+    # admin's hash is still running; sarah's first login must not queue behind it.
+    sarah_login = threading.Thread(target=check, args=("sarah", sarah, "sarah123"))
+    sarah_login.start()
+    sarah_login.join(timeout=5)
+    assert not sarah_login.is_alive() and results["sarah"]
+    assert admin_second.is_alive()
+
+    release.set()
+    admin_first.join(timeout=5)
+    admin_second.join(timeout=5)
+    assert results == {"admin-first": True, "admin-second": True, "sarah": True}
+
+
+def test_revocation_appended_during_compaction_reaches_other_workers(load_app, tmp_path):
+    app = load_app()
+    log_path = os.fspath(tmp_path / "revocations.log")
+    compactor, appender, reader = (app.TokenRevocationStore(log_path) for _ in range(3))
+    expires = time.time() + 600
+    compactor.revoke("jti-old", expires)
+
+    appended = threading.Thread(target=appender.revoke, args=("jti-late", expires))
+    compactor_sync = compactor.sync
+
+    def sync_then_append() -> None:
+        compactor_sync()
+        # Another worker logs out after compact() has read the log but before it replaces it.
+        appended.start()
+        appended.join(timeout=0.5)
+
+    compactor.sync = sync_then_append
+    compactor.compact()
+    appended.join(timeout=5)
+
+    reader.sync()
+    assert reader.is_revoked("jti-late", "u1", 0)
+    assert reader.is_revoked("jti-old", "u1", 0)
+
+
+def test_search_with_non_matching_second_word_is_bounded(load_app):
+    app = load_app()
+    index = app.InventorySearchIndex()
+    index.sync("inventory", 1, (("vm", f"vm-{number:06d}", "VC-1", "C-1", ()) for number in range(100_000)))
+
+    started = time.perf_counter()
+    assert index.search("vm nomatch", 20) == []
+    assert time.perf_counter() - started < 0.05
+    assert [hit["name"] for hit in index.search("vm-000001 c-1", 20)] == ["vm-000001"]
+
+
+def test_rollups_follow_a_reload_through_the_loader_diff(load_app, tmp_path):
+    path = tmp_path / "inventory.json"
+    payload = {
+        "vcenters": {"VC-A": {}, "VC-B": {}},
+        "vms": [{"vc": "VC-A", "name": "vm-a", "cluster": "C1"}, {"vc": "VC-B", "name": "vm-b", "cluster": "C2"}],
+        "datastores": [{"vc": "VC-A", "name": "DS-A", "ds_cluster": "D1", "size": 100, "cluster": "C1"}],
+        "esx": [],
+        "rdms": [{"vc": "VC-B", "naa": "naa.1", "size": 10, "connected": True, "esx_cluster": "C2"}],
+    }
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    app = load_app(LAZY_STARTUP="true", INVENTORY_SOURCE="json", INVENTORY_SNAPSHOT_PATH=os.fspath(path))
+    before = app.current_inventory()
+    app.inventory_rollups(before)
+
+    payload["rdms"].append({"vc": "VC-B", "naa": "naa.2", "size": 5, "connected": False, "esx_cluster": "C2"})
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    after = app.reload_inventory()
+
+    assert after.changes == {("rdms", "VC-B", "C2")}
+    assert after.tree["VC-A"]["C1"]["vms"] is before.tree["VC-A"]["C1"]["vms"]
+    carried, rebuilt = after.views["rollups"], app.build_inventory_rollups(after)
+    assert (carried.totals, carried.clusters, carried.vcenters) == (rebuilt.totals, rebuilt.clusters, rebuilt.vcenters)
+    assert carried.vcenters["VC-B"]["rdmCapacity"] == 15
+    assert carried.clusters[("VC-A", "C1")] is before.views["rollups"].clusters[("VC-A", "C1")]
+
+
+def test_pwwn_to_esx_accepts_an_esx_host_name(load_app, tmp_path):
+    path = tmp_path / "inventory.json"
+    payload = {
+        "vcenters": {"VC-A": {}},
+        "vms": [],
+        "datastores": [],
+        "esx": [
+            {"vc": "VC-A", "name": "esx-a-01", "esx_cluster": "C1", "pwwns": ["10:00:00:90:fa:90:aa:01"], "cluster": "C1"},
+            {"vc": "VC-A", "name": "esx-a-02", "esx_cluster": "C1", "pwwns": [], "cluster": "C1"},
+        ],
+        "rdms": [],
+    }
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    app = load_app(INVENTORY_SOURCE="json", INVENTORY_SNAPSHOT_PATH=os.fspath(path))
+    client = TestClient(app.app)
+    login(client)
+
+    # The dashboard falls back to the row name when an ESX row has no PWWNs.
+    by_name = client.get("/pwwn_to_esx", params={"input": "ESX-A-01"}).json()
+    assert by_name == "ESX: esx-a-01\nvCenter: VC-A\nCluster: C1\nPWWN-1: 10:00:00:90:fa:90:aa:01"
+    by_pwwn = client.post("/herzi/esx-pwwn", json={"input": "10:00:00:90:FA:90:AA:01"}).json()
+    assert by_pwwn == f"PWWN: 10:00:00:90:FA:90:AA:01\n{by_name}"
+    assert client.get("/pwwn_to_esx", params={"input": "esx-a-02"}).json().endswith("\nPWWNs: none")
+    assert client.get("/pwwn_to_esx", params={"input": "esx-missing"}).json() == "PWWN: esx-missing\nNo ESX host found"